@@ -0,0 +1,155 @@
+# Alert Store (#3, #4) - bounded ring of alerts, repeats coalesced, indexed by temple and severity
+import argparse
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+
+MAX_ALERTS = 1000
+COALESCE_SECONDS = 120  # A repeat of the same (temple, location, type) within this window bumps the open alert
+SEVERITY_RANK = {'Low': 0, 'Medium': 1, 'High': 2, 'Critical': 3}
+
+
+class AlertStore:
+    def __init__(self, max_alerts=MAX_ALERTS, coalesce_seconds=COALESCE_SECONDS):
+        self.max_alerts = max_alerts
+        self.coalesce = timedelta(seconds=coalesce_seconds)
+        self._alerts = OrderedDict()  # alert_id -> alert, oldest first
+        self._open = {}               # (temple, location, type) -> alert_id still accepting repeats
+        self._index = {}              # temple / severity / (temple, severity) -> deque of alert_ids, newest last
+        self._occurrence = {}         # alert_id -> occurrence key of the latest repeat, so one occurrence counts once
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._listeners = []          # fn(alert) run under the store lock on every new or coalesced alert
+        self.raised = 0
+        self.coalesced = 0
+        self.evicted = 0
+
+    def _bucket(self, key):
+        ids = self._index.get(key)
+        if ids is None:
+            ids = self._index[key] = deque(maxlen=self.max_alerts)  # Stale ids beyond the ring fall off here
+        return ids
+
+    def _indexes(self, temple, severity):
+        for key in (None, temple, ('severity', severity), (temple, severity)):
+            yield self._bucket(key)
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+        return listener
+
+    def _emit(self, alert):
+        for listener in self._listeners:
+            listener(alert)
+
+    def restore(self, alerts):
+        # Reload persisted alerts (event log replay), oldest first, without notifying listeners
+        with self._lock:
+            self._alerts, self._open, self._index, self._occurrence = OrderedDict(), {}, {}, {}
+            for alert in sorted(alerts, key=lambda a: a['alert_id'])[-self.max_alerts:]:
+                alert = dict(alert)
+                self._alerts[alert['alert_id']] = alert
+                self._open[(alert['temple'], alert['location'], alert['type'])] = alert['alert_id']
+                for ids in self._indexes(alert['temple'], alert['severity']):
+                    ids.append(alert['alert_id'])
+            self._ids = itertools.count(max(self._alerts, default=0) + 1)
+
+    def add(self, temple, location, type, severity='High', when=None, occurrence=None, **extra):
+        # Returns (alert, is_new); a coalesced repeat updates count/last_seen and keeps the worst severity.
+        # Repeats passing the same occurrence key (e.g. one sensor episode re-reported every tick) only count once
+        when = when or datetime.now()
+        key = (temple, location, type)
+        with self._lock:
+            self.raised += 1
+            alert = self._alerts.get(self._open.get(key))
+            if alert is not None and when - alert['last_seen'] <= self.coalesce:
+                alert_id = alert['alert_id']
+                if occurrence is None or occurrence != self._occurrence.get(alert_id):
+                    alert['count'] += 1
+                    self.coalesced += 1
+                if occurrence is not None:
+                    self._occurrence[alert_id] = occurrence
+                alert['last_seen'] = when
+                for k, v in extra.items():
+                    alert[k] = max(alert.get(k, v), v) if isinstance(v, (int, float)) else v
+                old = alert['severity']
+                if SEVERITY_RANK.get(severity, 0) > SEVERITY_RANK.get(old, 0):
+                    # Move the id between severity buckets; the all-alerts and temple indexes already hold it
+                    for key in (('severity', old), (temple, old)):
+                        if alert_id in self._bucket(key):
+                            self._bucket(key).remove(alert_id)
+                    alert['severity'] = severity
+                    for key in (('severity', severity), (temple, severity)):
+                        self._bucket(key).append(alert_id)
+                self._emit(alert)
+                return alert, False
+            alert = dict(alert_id=next(self._ids), type=type, location=location, temple=temple, time=when,
+                         last_seen=when, count=1, severity=severity, **extra)
+            self._alerts[alert['alert_id']] = alert
+            self._open[key] = alert['alert_id']
+            if occurrence is not None:
+                self._occurrence[alert['alert_id']] = occurrence
+            for ids in self._indexes(temple, severity):
+                ids.append(alert['alert_id'])
+            while len(self._alerts) > self.max_alerts:
+                _, old = self._alerts.popitem(last=False)
+                if self._open.get((old['temple'], old['location'], old['type'])) == old['alert_id']:
+                    del self._open[(old['temple'], old['location'], old['type'])]
+                self._occurrence.pop(old['alert_id'], None)
+                self.evicted += 1
+            self._emit(alert)
+            return alert, True
+
+    def recent(self, temple=None, severity=None, limit=50):
+        # Newest first, walking only the matching index - O(limit) plus any stale ids at the old end
+        key = (temple, severity) if temple and severity else ('severity', severity) if severity else temple
+        out, seen = [], set()
+        with self._lock:
+            for alert_id in reversed(self._index.get(key, ())):
+                alert = self._alerts.get(alert_id)
+                if alert is None or alert_id in seen or (severity and alert['severity'] != severity):
+                    continue
+                seen.add(alert_id)
+                out.append(dict(alert))
+                if len(out) >= limit:
+                    break
+        return out
+
+    def open_alert(self, temple, location, type):
+        # The alert still accepting repeats for this zone, if any
+        with self._lock:
+            alert = self._alerts.get(self._open.get((temple, location, type)))
+            return dict(alert) if alert is not None else None
+
+    def count(self, temple=None):
+        with self._lock:
+            if temple is None:
+                return len(self._alerts)
+            return sum(1 for alert_id in self._index.get(temple, ()) if alert_id in self._alerts)
+
+    def stats(self):
+        return {'stored': len(self._alerts), 'raised': self.raised, 'coalesced': self.coalesced, 'evicted': self.evicted}
+
+
+if __name__ == '__main__':
+    import random
+    parser = argparse.ArgumentParser(description='Raise a surge worth of repeated alerts and time dashboard queries.')
+    parser.add_argument('--alerts', type=int, default=200000)
+    args = parser.parse_args()
+    store = AlertStore()
+    temples = [f"Temple{i}" for i in range(4)]
+    zones = ['Main Gate', 'Darshan Hall', 'Parking', 'Queue Complex', 'Exit']
+    start_time = datetime(2025, 10, 4, 5)
+    start = time.perf_counter()
+    for i in range(args.alerts):
+        store.add(random.choice(temples), random.choice(zones), 'Panic Detected', random.choice(['Medium', 'High']),
+                  when=start_time + timedelta(seconds=i), panic_score=random.random())
+    elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(1000):
+        store.recent('Temple0', limit=50)
+    query = (time.perf_counter() - start) / 1000
+    print(f"{args.alerts:,} raised in {elapsed:.2f}s ({args.alerts / elapsed:,.0f}/s); {store.stats()}; "
+          f"recent(temple, 50) {query * 1e6:.0f} us")
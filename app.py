@@ -1,22 +1,42 @@
+import time
+import_start = time.perf_counter()  # First phase of the startup breakdown
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestRegressor
-from datetime import datetime, timedelta, date
-import matplotlib.pyplot as plt
-import folium
-from streamlit_folium import folium_static
-from sklearn.model_selection import train_test_split
+from datetime import datetime, timedelta
 import io
-import time  # Added for real-time simulation
-
-# Temple Data: Coords & Base Daily Footfall (from Gujarat Tourism/Wiki)
-TEMPLE_DATA = {
-    'Somnath': {'lat': 20.888, 'lng': 70.401, 'base_footfall': 50000},  # ~18M annual 
-    'Dwarka': {'lat': 22.238, 'lng': 68.968, 'base_footfall': 25000},    # ~9M annual 
-    'Ambaji': {'lat': 24.333, 'lng': 72.850, 'base_footfall': 25000},    # ~9M annual 
-    'Pavagadh': {'lat': 22.461, 'lng': 73.512, 'base_footfall': 6000}    # ~2.2M annual 
-}
+import os
+from model_registry import ModelRegistry
+from forecast import ForecastEngine, TODAY
+from temples import CATALOG, TEMPLE_DATA
+from lattice import lattice_report
+from online import ResidualCorrector, expected_share
+from queue_engine import QueueEngine
+from queue_sim import WaitEstimator
+from queue_metrics import QueueMetrics
+from status_api import StatusAPI
+from map_cache import MapCache, build_folium_map, map_markers
+from charts import ChartCache
+from alerts import AlertStore
+from event_log import EventLog
+from sensors import SensorHub, SensorServer, SensorSimulator, PANIC_THRESHOLD
+from perf import SPANS, StartupTimer
+
+run_start = time.perf_counter()
+
+# Startup (cold replica) - heavy libraries load on first use; phases of the first run are recorded once
+@st.cache_resource
+def get_startup():
+    return StartupTimer()
+
+startup = get_startup()
+startup.mark('imports', import_start)
+# YATRA_STARTUP=eager loads every model at boot; the default loads them only if a forecast has to be rebuilt
+STARTUP_MODE = os.environ.get('YATRA_STARTUP', 'lazy')
+# Span histograms are also written as Prometheus text for a node_exporter textfile collector
+if os.environ.get('YATRA_METRICS_FILE'):
+    SPANS.export_every(os.environ['YATRA_METRICS_FILE'])
+
 # Hardcoded Multilingual Support (Expanded)
 # Fix: Define English first, then copy for others
 english_trans = {
@@ -184,108 +204,271 @@ TRANSLATIONS = {
         'refresh_queue': 'कतार स्थिति रिफ्रेश करें'
     }
 }
+# Durable State (#2, #3, #4) - tickets, alerts and flags are appended to an SQLite log (YATRA_EVENT_LOG) and replayed on restart
+@st.cache_resource
+def get_event_log():
+    return EventLog()
+
+FLAG_TTL_SECONDS = {'surge_active': 3600, 'crowd_alert_sent': 600, 'drone_dispatched': 1800}  # A set flag nobody refreshes lapses
+
+def set_flag(name, value=True):
+    # The log holds the shared value: logged on change, and a flag that is still set is re-logged every quarter TTL so it
+    # never lapses while its condition holds. Only a caller seeing the condition end (value=False) clears it
+    log = get_event_log()
+    logged, when = log.state.flag(name)
+    if logged != value or (value and time.time() - when > FLAG_TTL_SECONDS[name] / 4):
+        log.set_flag(name, value)
+    st.session_state[name] = value
+    st.session_state[f"{name}_at"] = time.time()
+
 # Session State - Enhanced for usability
-if 'queue_data' not in st.session_state: st.session_state.queue_data = []
-if 'alerts' not in st.session_state: st.session_state.alerts = []
-if 'surge_active' not in st.session_state: st.session_state.surge_active = False
-if 'crowd_alert_sent' not in st.session_state: st.session_state.crowd_alert_sent = False
-if 'drone_dispatched' not in st.session_state: st.session_state.drone_dispatched = False
+for flag, ttl in FLAG_TTL_SECONDS.items():
+    if flag not in st.session_state or (st.session_state[flag] and time.time() - st.session_state[f"{flag}_at"] > ttl):
+        # New session, or this session's copy went stale: take the shared value, which lapses only if nobody refreshed it
+        st.session_state[flag], st.session_state[f"{flag}_at"] = get_event_log().state.flag(flag, ttl)
 if 'density' not in st.session_state: st.session_state.density = 0.0
 if 'alert' not in st.session_state: st.session_state.alert = None
 if 'user_id' not in st.session_state: st.session_state.user_id = None  # For pilgrim view tracking
 
 # Model with Temple Param (#1) - AI/ML-based Crowd Prediction
-@st.cache_data
-def load_and_train_model(base_footfall):
-    np.random.seed(42)
-    dates = pd.date_range(start='2024-01-01', end='2026-01-01', freq='D')
-    n = len(dates)
-    festivals = ['2025-01-14', '2025-02-26', '2025-10-20', '2025-11-15', '2025-09-29', '2025-10-07']  # Example festivals
-    is_festival = [1 if d.strftime('%Y-%m-%d') in festivals else 0 for d in dates]
-    temp = np.random.normal(28, 5, n).clip(15, 40)  # Simulated weather
-    is_holiday = [(d.weekday() >= 5) or isf for d, isf in zip(dates, is_festival)]
-    festival_boost = np.array(is_festival) * (base_footfall * 2)
-    holiday_boost = np.array(is_holiday) * (base_footfall * 0.2)
-    weather_factor = (30 - temp) / 10
-    noise = np.random.normal(0, base_footfall * 0.1, n)
-    footfall = (base_footfall + festival_boost + holiday_boost + weather_factor * base_footfall * 0.1 + noise).clip(0, base_footfall * 3)
-    
-    df = pd.DataFrame({'date': dates, 'footfall': footfall, 'temperature': temp, 'is_festival': is_festival, 'is_holiday': is_holiday})
-    df['month'] = df['date'].dt.month
-    df['dayofweek'] = df['date'].dt.dayofweek
-    features = ['temperature', 'is_festival', 'is_holiday', 'month', 'dayofweek']
-    X = df[features]
-    y = df['footfall']
-    
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    model = RandomForestRegressor(n_estimators=100, random_state=42)
-    model.fit(X_train, y_train)
-    return model, features, df
+# One shared registry per server process (st.cache_resource): models are trained once, stored under models/ and
+# loaded once, so every session and rerun reuses the same forest instead of a pickled copy per call.
+@st.cache_resource
+def get_model_registry():
+    registry = ModelRegistry()
+    return registry.warm(TEMPLE_DATA) if STARTUP_MODE == 'eager' else registry
 
+def load_and_train_model(temple):
+    return get_model_registry().get(temple, TEMPLE_DATA[temple]['base_footfall'])
+
+
+# Live gate-counter readings correct the forecast intra-day (shared by all sessions)
+@st.cache_resource
+def get_corrector():
+    return ResidualCorrector()
+
+# Forecast table for all temples over a rolling window; predict_crowd is a slice of it.
+# Tables are saved next to the models (or prebuilt with `python forecast.py`) and reloaded without sklearn
+@st.cache_resource
+def get_forecast_engine():
+    # YATRA_PREDICTOR=lattice serves predictions from the compiled lattice instead of the forest
+    return ForecastEngine(get_model_registry(), TEMPLE_DATA, predictor=os.environ.get('YATRA_PREDICTOR', 'forest'),
+                          corrector=get_corrector(), cache_dir=get_model_registry().model_dir)
+
+@SPANS.timed()
 def predict_crowd(temple, days_ahead=7):
-    data = TEMPLE_DATA[temple]
-    model, features, _ = load_and_train_model(data['base_footfall'])
     try:
-        today = date(2025, 10, 4)  # Set to current date as per prompt
-        future_dates = pd.date_range(start=today, periods=days_ahead, freq='D')
-        future_n = len(future_dates)
-        future_temp = np.random.normal(28, 5, future_n).clip(15, 40)
-        future_fest = [1 if d.strftime('%Y-%m-%d') in ['2025-10-20', '2025-11-01', '2025-11-15'] else 0 for d in future_dates]
-        future_hol = [(d.weekday() >= 5) or ff for d, ff in zip(future_dates, future_fest)]
-        future_df = pd.DataFrame({'date': future_dates, 'temperature': future_temp, 'is_festival': future_fest, 'is_holiday': future_hol})
-        future_df['month'] = future_df['date'].dt.month
-        future_df['dayofweek'] = future_df['date'].dt.dayofweek
-        X_future = future_df[features]
-        predictions = model.predict(X_future)
-        future_df['predicted_footfall'] = predictions
-        return future_df
+        return get_forecast_engine().forecast(temple, days_ahead, TODAY)
     except Exception as e:
         st.error(f"Prediction error: {e}")
         return pd.DataFrame()
 
 # Queue Management (#2) - Smart Queue & Ticketing
+# Process-wide queues: every pilgrim session and the authority dashboard see the same tickets
+@st.cache_resource
+def get_queue_engine():
+    engine = QueueEngine()
+    log = get_event_log()
+    tickets = list(log.state.tickets.values())  # Recovered before any new ticket events can arrive
+    engine.restore(tickets)
+    get_queue_metrics().restore(tickets)
+    engine.subscribe(get_queue_metrics().on_event)
+    engine.subscribe(log.record_ticket)
+    return engine
+
+# Running per-temple aggregates kept current by queue events - dashboards never scan the tickets
+@st.cache_resource
+def get_queue_metrics():
+    return QueueMetrics()
+
+# JSON/SSE ticket status for phones (YATRA_API_PORT), served from the same queues without running this script
+@st.cache_resource
+def get_status_api():
+    def today_footfall(temple):
+        return float(get_forecast_engine().forecast(temple, 1, TODAY)['predicted_footfall'].iloc[0])
+    return StatusAPI(get_queue_engine(), TEMPLE_DATA, get_queue_metrics(), forecast=today_footfall, prometheus=SPANS.to_prometheus).start()
+
+# Wait estimates come from a simulated day of the forecast crowd, re-run as the forecast moves
+@st.cache_resource
+def get_wait_estimator():
+    return WaitEstimator(TEMPLE_DATA)
+
+@SPANS.timed()
 def join_queue(temple, user_id, priority=False, lang='English'):
     now = datetime.now()
     pred_df = predict_crowd(temple, 1)
-    base = TEMPLE_DATA[temple]['base_footfall']
-    surge_threshold = base * 2
-    surge_penalty = 60 if (not pred_df.empty and pred_df['predicted_footfall'].iloc[0] > surge_threshold) else 0
-    base_wait = np.random.randint(30, 120)
-    est_wait = base_wait + (0 if priority else 15) - surge_penalty
+    daily = pred_df['predicted_footfall'].iloc[0] if not pred_df.empty else TEMPLE_DATA[temple]['base_footfall']
+    est_wait = max(1, int(round(get_wait_estimator().estimate(temple, daily, now, priority))))
     slot = (now + timedelta(minutes=est_wait)).strftime('%H:%M')
     slot_type = 'Free' if est_wait < 45 else 'Paid'
     entry = {'temple': temple, 'user_id': user_id, 'join_time': now, 'priority': priority, 'lang': lang, 'slot': slot, 'status': 'Waiting', 'est_wait': est_wait, 'slot_type': slot_type}
-    st.session_state.queue_data.append(entry)
+    get_queue_engine().join(temple, entry)
     return TRANSLATIONS[lang]['token_issued'].format(est_wait, slot) + f" ({slot_type} - Dynamic Slot)"
 
-# Surveillance Simulation (#3) - IoT & Surveillance
+# Sensor Ingestion (#3) - one socket server + ring buffers per process, fed by gate/zone sensors.
+# The server checks thresholds every second and raises alerts itself, so nobody has to have a dashboard open
+@st.cache_resource
+def get_sensor_server():
+    server = SensorServer(SensorHub())
+    store = get_alert_store()
+    server.hub.subscribe(lambda temple, zone, panic_score, density, episode:
+                         store.add(temple, zone, 'Panic Detected', 'High', occurrence=episode, panic_score=round(panic_score, 2)))
+    return server.start()
+
+# Stand-in feed for demos; set YATRA_SENSOR_SIM=0 when real sensor gateways connect to the socket
+@st.cache_resource
+def get_sensor_simulator():
+    server = get_sensor_server()
+    if os.environ.get('YATRA_SENSOR_SIM', '1') == '0':
+        return None
+    return SensorSimulator(list(TEMPLE_DATA)).start(server)
+
+# Alerts are shared by every authority session; repeats for the same zone coalesce into one row
+@st.cache_resource
+def get_alert_store():
+    store = AlertStore()
+    store.restore(list(get_event_log().state.alerts.values()))
+    store.subscribe(get_event_log().record_alert)
+    return store
+
+# Surveillance Monitoring (#3) - IoT & Surveillance, read from the live sensor windows
+@SPANS.timed()
 def simulate_monitoring(temple):
-    density = np.random.uniform(0.3, 0.9)
-    if density > 0.8:
-        panic_chance = np.random.choice([True, False], p=[0.4, 0.6])
-        if panic_chance:
-            alert = {'type': 'Panic Detected', 'location': np.random.choice(['Main Gate', 'Darshan Hall', 'Parking']), 'temple': temple, 'time': datetime.now(), 'severity': 'High'}
-            st.session_state.alerts.append(alert)
-            st.session_state.crowd_alert_sent = True
-            return alert, density
+    get_sensor_simulator()
+    zones = get_sensor_server().hub.temple_status(temple)
+    if zones.empty:
+        return None, 0.0
+    density = float(np.average(zones['density'], weights=zones['readings']))
+    worst = zones.loc[zones['panic_score'].idxmax()]
+    if worst['panic_score'] >= PANIC_THRESHOLD:  # Raised by the sensor server's own check; this only reads it
+        alert = get_alert_store().open_alert(temple, worst['zone'], 'Panic Detected')
+        set_flag('crowd_alert_sent')
+        return alert or {'location': worst['zone'], 'panic_score': round(float(worst['panic_score']), 2)}, density
+    set_flag('crowd_alert_sent', False)  # Every zone is back under the threshold
     return None, density
 
 # Map Creation for Various Features (#4, #5, #7)
+@SPANS.timed()
 def create_map(temple, feature='parking'):
     data = TEMPLE_DATA[temple]
-    m = folium.Map(location=[data['lat'], data['lng']], zoom_start=15)
-    spots = [(data['lat'] + 0.001, data['lng'] + 0.001), (data['lat'] - 0.001, data['lng'] - 0.001)]
-    for spot in spots:
-        folium.Marker(spot, popup="Empty Parking", icon=folium.Icon(color='green')).add_to(m)
-    folium.Marker([data['lat'], data['lng']], popup=f"{temple} Temple", icon=folium.Icon(color='red')).add_to(m)
-    if feature == 'medical':
-        folium.Marker([data['lat'] - 0.002, data['lng'] + 0.002], popup="Medical Center", icon=folium.Icon(color='orange')).add_to(m)
-    if feature == 'drone' and st.session_state.drone_dispatched:
-        folium.Marker([data['lat'] + 0.0015, data['lng'] - 0.0005], popup="Drone w/ Kit", icon=folium.Icon(color='blue')).add_to(m)
-    return m
+    return build_folium_map(data, map_markers(temple, data, feature, st.session_state.drone_dispatched, CATALOG.markers(temple)))
+
+# Maps are rendered to HTML once per (temple, feature, drone state) and shared by every session
+@st.cache_resource
+def get_map_cache():
+    return MapCache(cache_dir=os.path.join(get_model_registry().model_dir, 'maps'))
+
+@SPANS.timed()
+def show_map(temple, feature='parking'):
+    lite = st.session_state.get('lite_maps', False)
+    html = get_map_cache().get(temple, TEMPLE_DATA[temple], feature, st.session_state.drone_dispatched, lite, CATALOG.markers(temple))
+    if hasattr(st, 'iframe'):
+        st.iframe(html, height=510 if not lite else 360)
+    else:  # Streamlit releases before st.iframe
+        import streamlit.components.v1 as components
+        components.html(html, height=510 if not lite else 360)
+
+# Facility Lookup (#4, #5) - nearest posts from the catalog's grid index; no GPS in the prototype, so pilgrims stand at the shrine
+SEARCH_RADIUS_M = 5000
+DRONE_SPEED_MPS = 15
+
+def nearest_facilities(temple, kind, n=3, available_only=False):
+    data = TEMPLE_DATA[temple]
+    return CATALOG.nearest(data['lat'], data['lng'], kind, n, SEARCH_RADIUS_M, available_only)
+
+# Free parking follows the live 'Parking' zone density from the sensor hub
+def parking_status(temple):
+    get_sensor_simulator()
+    lots = CATALOG.facilities_for(temple, 'parking')
+    zones = get_sensor_server().hub.temple_status(temple)
+    density = zones.loc[zones['zone'] == 'Parking', 'density']
+    occupied = float(density.iloc[0]) if not density.empty else 0.0
+    CATALOG.set_free(lots['facility_id'], (lots['capacity'] * (1 - min(occupied, 1.0))).astype(int))
+    return CATALOG.facilities_for(temple, 'parking')
+
+def show_parking(temple, t):
+    lots = parking_status(temple)
+    capacity = lots['capacity'].sum()
+    st.info(t['empty_spots'].format(round(10 * lots['free'].sum() / capacity) if capacity else 0))
+    nearby = nearest_facilities(temple, 'parking', 5, available_only=True)
+    if not nearby.empty:
+        st.dataframe(nearby[['name', 'free', 'capacity', 'distance_m']], hide_index=True)
+
+# Styler rendering is a hot spot on big frames, so it gets its own span
+def show_table(styler, **kwargs):
+    with SPANS.span('dataframe/style'):
+        st.dataframe(styler, **kwargs)
+
+# Live Widgets - only these re-run on their own timers; the rest of the page is static until the user interacts
+# Intervals in seconds, overridable per widget, e.g. YATRA_REFRESH_QUEUE_STATUS=5
+REFRESH_SECONDS = {name: int(os.environ.get(f"YATRA_REFRESH_{name.upper()}", default))
+                   for name, default in {'queue_status': 10, 'density': 5, 'alerts': 15}.items()}
+
+@st.fragment(run_every=REFRESH_SECONDS['queue_status'])
+def queue_status(temple, t):
+    my_tickets = get_queue_engine().tickets_for_user(temple, st.session_state.user_id)
+    if my_tickets:
+        for row in my_tickets:
+            if row['status'] != 'Waiting':
+                st.caption(f"Pass #{row['ticket_id']}: {row['status']}")
+                continue
+            elapsed = (datetime.now() - row['join_time']).total_seconds() / 60
+            remaining = max(0, row['est_wait'] - elapsed)
+            progress = min(1.0, elapsed / row['est_wait'])
+            st.progress(progress)
+            st.metric("Wait Left", f"{remaining:.0f} min", f"Slot: {row['slot']}")
+            st.button(f"Cancel Pass #{row['ticket_id']}", key=f"cancel_{row['ticket_id']}",
+                      on_click=get_queue_engine().cancel, args=(row['ticket_id'],))
+            link = get_status_api().public_link(row['ticket_id'])  # Set YATRA_API_PUBLIC_URL to offer tracking links
+            if link:
+                st.caption(f"Track on your phone: {link}")
+        st.button(t['refresh_queue'])  # Real-time update - clicking re-runs just this fragment
+
+@st.fragment(run_every=REFRESH_SECONDS['density'])
+def density_metrics(temple, t):
+    st.session_state.alert, st.session_state.density = simulate_monitoring(temple)
+    st.metric("IoT Sensors", f"{st.session_state.density*100:.0f}% Density")
+    st.metric("CCTV Feeds", "Live", "AI Analytics")
+    st.metric("Drones", "4/5 Deployed", "Auto Patrol")
+    zones = get_sensor_server().hub.temple_status(temple)
+    if not zones.empty:
+        st.dataframe(zones[['zone', 'density', 'rate', 'panic_score', 'readings']].round(3), hide_index=True)
+    if st.session_state.alert:
+        st.error(t['panic_detected'].format(st.session_state.alert['location']))
+
+@st.fragment(run_every=REFRESH_SECONDS['alerts'])
+def queues_and_alerts(temple, t):
+    engine = get_queue_engine()
+    summary = get_queue_metrics().summary(temple)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Waiting Pilgrims", summary['waiting'])
+    col2.metric("Priority Share", f"{summary['priority_share']:.0%}")
+    col3.metric("Paid Slots", summary['slot_types'].get('Paid', 0), f"{summary['served']} served")
+    col4.button("Call Next Pilgrim", disabled=summary['waiting'] == 0, on_click=engine.advance, args=(temple,))
+    q_df = pd.DataFrame(engine.head(temple, 200))  # Next 200 in call order, not the whole queue
+    if not q_df.empty:
+        show_table(q_df.style.background_gradient(cmap='coolwarm'))
+    a_df = pd.DataFrame(get_alert_store().recent(temple, limit=50))
+    if not a_df.empty:
+        show_table(a_df.style.highlight_max(subset=[c for c in ('count', 'panic_score') if c in a_df]), hide_index=True)
+        if st.button(t['dispatch'], type="primary"):
+            st.success(t['dispatched'])
+    else:
+        st.info(t['no_alerts'])
+
+# Charts are drawn off pyplot's global figure registry and cached as PNG bytes keyed by their inputs
+@st.cache_resource
+def get_chart_cache():
+    return ChartCache()
+
+@SPANS.timed()
+def forecast_chart(pred_df, title):
+    dates = tuple(d.strftime('%Y-%m-%d') for d in pred_df['date'])
+    return get_chart_cache().render('forecast_bars', dates, tuple(pred_df['predicted_footfall'].round(0)), title)
 
 # UI - Enhanced for Usability with All Features Highlighted
 st.set_page_config(page_title="Yatra Sevak - 4 Temples", layout="wide", initial_sidebar_state="expanded")
+get_sensor_simulator()  # Starts sensor ingestion and alerting with the first page view, not the first dashboard
 st.markdown("""
 <style>
 .main {background-color: #e6f3ff;}
@@ -304,232 +487,289 @@ t = TRANSLATIONS[lang]
 temple = st.sidebar.selectbox(t['select_temple'], list(TEMPLE_DATA.keys()))
 role = st.sidebar.selectbox(t['view_as'], [t['pilgrim_app'], t['authority_dashboard']])
 st.sidebar.title(f"{t['title']} - {temple}")
+st.sidebar.toggle("Low-bandwidth maps", key='lite_maps', help="Plain markers, no icon/CSS bundles - for slow phone connections")
 
 # Sidebar Sims - For Demo and Usability Testing
 st.sidebar.header("Demo Simulations (For Testing Features)")
 if st.sidebar.button('Simulate Surge (#1 → #2)'):
-    st.session_state.surge_active = True
+    set_flag('surge_active')
     st.rerun()
 if st.sidebar.button('Simulate Crowd Panic (#3 → #4 → #6)'):
-    simulate_monitoring(temple)
+    # Pushes one zone's sensors into a surge; the density widget raises the alert once the window sees it
+    if get_sensor_simulator() is not None:
+        get_sensor_simulator().surge(temple)
     st.rerun()
+if st.sidebar.button('Simulate Gate Counter Feed (#1)'):
+    # Gate counts since the previous reading (or since opening), running ~30% above forecast
+    pred_df = predict_crowd(temple, 1)
+    now = datetime.combine(TODAY, datetime.now().time())
+    since = get_corrector().last_reading(temple, TODAY) or datetime.combine(TODAY, datetime.min.time())
+    if pred_df.empty:  # predict_crowd has already shown the error
+        st.sidebar.warning("No forecast for today - gate counts need one to compare against.")
+    elif now <= since:  # TODAY is fixed, so a stored reading from a later clock time on another real day is still ahead
+        st.sidebar.info(f"Last gate reading is at {since:%H:%M}; try again after that time.")
+    else:
+        expected = pred_df['base_forecast'].iloc[0] * (expected_share(now) - expected_share(since))
+        get_corrector().observe(temple, now, int(expected * np.random.uniform(1.2, 1.4)))
+        st.rerun()
 st.sidebar.markdown("---")
 st.sidebar.info("Prototype simulates all 7 features: AI Prediction (#1), Queue/Ticketing (#2), Surveillance (#3), Emergency (#4), Traffic (#5), Engagement (#6), Accessibility (#7). No real hardware needed.")
 
 st.title(f"{t['title']} - {temple}")
+startup.mark('setup')
+
+# Sections - each one renders only when it is the active section
+def pilgrim_home(temple, t, lang):  # #6 - Pilgrim Engagement Platforms
+    st.markdown(f"<div class='section-header'>{t['temple_info_wait']}</div>", unsafe_allow_html=True)
+    pred_df = predict_crowd(temple, 3)
+    if not pred_df.empty:
+        show_table(pred_df[['date', 'predicted_footfall']].style.background_gradient(cmap='Blues'))
+    col1, col2, col3 = st.columns(3)
+    with col1: st.success(f"🕐 {t['temple_timings']}")
+    with col2: st.info(f"🏥 {t['facilities']}")
+    with col3: st.error(f"📞 {t['emergency_contacts']}")
+    st.info(f"🗺️ {t['routes']}")
+    st.info(t['current_weather'])
+    show_map(temple, 'parking')
+    if st.session_state.surge_active:
+        st.warning(t['surge_alert'])
+    if st.session_state.crowd_alert_sent:
+        st.warning("🚨 Avoid area - High crowd detected! (#6 Notification)")
+
+def pilgrim_queue(temple, t, lang):  # #2 - Smart Queue & Ticketing Systems
+    st.markdown(f"<div class='section-header'>{t['virtual_darshan']}</div>", unsafe_allow_html=True)
+    st.info(t['dynamic_slots'])
+    priority = st.checkbox(t['elderly_priority'], key='keep_priority')
+    if st.button(t['join_btn'], use_container_width=True):
+        msg = join_queue(temple, st.session_state.user_id, priority, lang)
+        st.success(msg)
+        # QR Code Simulation
+        my_ticket = get_queue_engine().tickets_for_user(temple, st.session_state.user_id)[-1]
+        qr_text = f"Pass: {temple}-User{st.session_state.user_id} #{my_ticket['ticket_id']} Slot:{my_ticket['slot']}"
+        st.image(get_chart_cache().render('pass', qr_text))
+    if st.button(t['simulate_turn']):
+        st.balloons()
+        st.success(t['your_turn'])
+    queue_status(temple, t)
+
+def pilgrim_sos(temple, t, lang):  # #4 - Emergency & Safety Solutions
+    st.markdown(f"<div class='section-header'>{t['emergency_sos']}</div>", unsafe_allow_html=True)
+    if st.button(t['press_sos'], type="primary"):
+        st.error(t['sos_sent'])
+        set_flag('drone_dispatched')
+        st.success(t['drone_dispatch'])
+        medical = nearest_facilities(temple, 'medical', 1)
+        drone = nearest_facilities(temple, 'drone_base', 1)
+        if not medical.empty:
+            st.info(f"Nearest medical post: {medical['name'].iloc[0]} - {medical['distance_m'].iloc[0]:.0f}m")
+        if not drone.empty:
+            st.info(f"Drone from {drone['name'].iloc[0]}: {drone['distance_m'].iloc[0]:.0f}m, ETA ~{drone['distance_m'].iloc[0] / DRONE_SPEED_MPS:.0f}s")
+        show_map(temple, 'drone')
+
+def pilgrim_surveillance(temple, t, lang):  # #3 - IoT & Surveillance Systems
+    st.markdown(f"<div class='section-header'>{t['surveillance']}</div>", unsafe_allow_html=True)
+    if st.button(t['scan_now']):
+        alert, density = simulate_monitoring(temple)
+        st.image(get_chart_cache().render('density_pie', round(density, 2), (t['crowded'], t['safe']), 'CCTV Density (#3)'))
+        st.metric("Sensors", f"{density*100:.0f}%", "IoT")
+        st.metric("Drones", "Active", delta="Monitoring")
+        if alert:
+            st.error(t['panic_detected'].format(alert['location']))
+
+def pilgrim_traffic(temple, t, lang):  # #5 - Traffic & Mobility Management
+    st.markdown(f"<div class='section-header'>{t['parking_mobility']}</div>", unsafe_allow_html=True)
+    show_map(temple, 'parking')
+    show_parking(temple, t)
+    st.subheader(t['shuttle_schedule'])
+    schedule = pd.DataFrame({
+        'Time': ['10AM', '12PM', '2PM', '4PM'],
+        'From': [f"{temple} Parking", 'Main Gate', 'Bus Station', 'Approach Road'],
+        'To': ['Temple', f"{temple} Parking", 'Temple', 'Shuttle Hub'],
+        'Status': ['On Time', 'Delayed 5min', 'On Time', 'Police Coordinated']
+    })
+    show_table(schedule.style.background_gradient(cmap='viridis'))
+    st.subheader(t['traffic_flow'])
+    flow = np.random.choice(['Smooth', 'Moderate', 'Congested'])
+    st.metric("Flow Status", flow, "Police Dynamic System")
+
+def pilgrim_accessibility(temple, t, lang):  # #7 - Accessibility Features
+    st.markdown(f"<div class='section-header'>{t['voice_guide']}</div>", unsafe_allow_html=True)
+    if st.button('Start Voice-Guided Mode (#7)'):
+        st.info(t['audio_sim'])
+        st.audio("data:audio/wav;base64,UklGRnoGAABXQVZFZm10IBAAAAABAAEAQB8AAEAfAAABAAgAZGF0YQoGAACBhYqFbF1fdJivrJBhNjVgodDbq2EcDbiIAA==", format="audio/wav")
+    st.info("AR Navigation Sim: Priority route highlighted for disabled/elderly.")
+
+def pilgrim_medical(temple, t, lang):  # #4 - Medical Assistance Mapping (Part of Emergency)
+    st.markdown(f"<div class='section-header'>{t['medical_map']}</div>", unsafe_allow_html=True)
+    show_map(temple, 'medical')
+    medical = nearest_facilities(temple, 'medical')
+    if medical.empty:
+        st.warning(f"No medical post within {SEARCH_RADIUS_M / 1000:.0f} km - call emergency services.")
+        return
+    st.info(f"Nearest Aid: {medical['name'].iloc[0]} - {medical['distance_m'].iloc[0]:.0f}m - Mapped for Quick Response (#4).")
+    st.dataframe(medical[['name', 'capacity', 'distance_m']], hide_index=True)
+
+def pilgrim_prediction(temple, t, lang):  # #1 - Dedicated AI Crowd Prediction for Usability
+    st.markdown(f"<div class='section-header'>{t['prediction']}</div>", unsafe_allow_html=True)
+    pred_df = predict_crowd(temple, 7)
+    if not pred_df.empty:
+        show_table(pred_df.style.background_gradient(cmap='YlOrRd'))
+        st.image(forecast_chart(pred_df, f'Predicted Footfall - {temple} (#1)'))
+
+def authority_prediction(temple, t, lang):  # #1 - AI/ML-based Crowd Prediction Models
+    st.markdown(f"<div class='section-header'>{t['prediction']}</div>", unsafe_allow_html=True)
+    with st.expander("Model Registry"):
+        reg_stats = get_model_registry().stats()
+        col1, col2 = st.columns(2)
+        col1.metric("Registry Hits", reg_stats['hits'])
+        col2.metric("Registry Misses", reg_stats['misses'])
+        st.json(reg_stats['load_times'])
+        st.json(get_forecast_engine().stats())
+        st.json(get_corrector().stats(temple))
+        st.json(get_wait_estimator().stats())
+        st.json(get_map_cache().stats())
+        st.json(get_chart_cache().stats())
+        st.json(get_alert_store().stats())
+        st.json(get_status_api().stats())
+        st.json(get_event_log().stats())
+        if st.button("Lattice vs Forest Report"):
+            model, features, hist_df = load_and_train_model(temple)
+            lat = get_model_registry().get_lattice(temple, TEMPLE_DATA[temple]['base_footfall'])
+            st.json(lattice_report(model, features, hist_df, lat))
+    pred_df = predict_crowd(temple, 7)
+    if not pred_df.empty:
+        show_table(pred_df.style.background_gradient(cmap='YlOrRd'))
+        st.image(forecast_chart(pred_df, f'Surge Forecast - {temple} (#1: Historical/Weather/Holidays/Festivals)'))
+        high_surge = pred_df[pred_df['predicted_footfall'] > TEMPLE_DATA[temple]['base_footfall'] * 2]
+        if not high_surge.empty:
+            st.warning(t['surge_alert'].format(high_surge['date'].iloc[0].strftime('%Y-%m-%d')))
+            set_flag('surge_active')
+
+def authority_surveillance(temple, t, lang):  # #3 - IoT & Surveillance Systems
+    st.markdown(f"<div class='section-header'>{t['surveillance']}</div>", unsafe_allow_html=True)
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button(t['scan_now'], use_container_width=True):
+            _, density = simulate_monitoring(temple)
+            st.image(get_chart_cache().render('density_pie', round(density, 2), (t['crowded'], t['safe']), figsize=(6.4, 4.8)))
+    with col2:
+        density_metrics(temple, t)
+
+def authority_queues(temple, t, lang):  # #2 + #4 - Smart Queue & Emergency Alerts
+    st.markdown(f"<div class='section-header'>{t['active_queues']}</div>", unsafe_allow_html=True)
+    queues_and_alerts(temple, t)
+
+def authority_barricades(temple, t, lang):  # #4 - Smart Barricade Systems
+    st.markdown(f"<div class='section-header'>{t['barricades']}</div>", unsafe_allow_html=True)
+    statuses = {'Main Gate': 'Locked (High Surge)', 'Darshan Hall': 'Open', 'Exit': 'Active'}
+    for loc, stat in statuses.items():
+        color = 'red' if 'Locked' in stat else 'green' if 'Open' in stat else 'orange'
+        st.metric(loc, stat, delta="AI-Enabled (#4)")
+
+def authority_traffic(temple, t, lang):  # #5 - Traffic & Mobility Management
+    st.markdown(f"<div class='section-header'>{t['parking_mobility']}</div>", unsafe_allow_html=True)
+    show_map(temple, 'parking')
+    show_parking(temple, t)
+    st.subheader(t['shuttle_schedule'])
+    schedule = pd.DataFrame({
+        'Time': ['10AM', '12PM', '2PM'],
+        'Route': [f"{temple} Parking → Temple", 'Gate → Parking', 'Station → Temple'],
+        'Coord': ['Police Cleared', 'On Time', 'Dynamic Reroute']
+    })
+    show_table(schedule.style.background_gradient(cmap='viridis'))
+    st.subheader(t['traffic_flow'])
+    light = np.random.choice(['🟢 Green', '🟡 Yellow', '🔴 Red'])
+    st.metric("Flow", light, "City Police System")
+
+def authority_engagement(temple, t, lang):  # #6 - Pilgrim Engagement Platforms
+    st.markdown(f"<div class='section-header'>Pilgrim Engagement </div>", unsafe_allow_html=True)
+    col1, col2, col3 = st.columns(3)
+    summary = get_queue_metrics().summary(temple)
+    col1.metric("Avg Wait Time", f"{summary['avg_wait']:.0f} min" if summary['avg_wait'] is not None else "N/A")
+    col2.metric("Notifications Sent", int(st.session_state.crowd_alert_sent) + int(st.session_state.surge_active))
+    col3.metric("Active Pilgrims", summary['waiting'])
+    if summary['waiting']:
+        hist = get_queue_metrics().wait_histogram(temple)
+        st.caption("Estimated waits (min): " + " · ".join(f"{k}: {v}" for k, v in hist.items() if v))
+    st.info(f"{t['temple_timings']} | {t['routes']} | {t['facilities']} | {t['emergency_contacts']}")
+
+def authority_accessibility(temple, t, lang):  # #7 - Accessibility Features
+    st.markdown(f"<div class='section-header'>{t['accessibility']}</div>", unsafe_allow_html=True)
+    st.checkbox("Enable Priority Queues ", key='keep_priority_queues')
+    if st.button("Broadcast Voice Navigation "):
+        st.success("Voice Guide Broadcasted to Devices ")
+        st.info(t['audio_sim'])
+
+def authority_sos(temple, t, lang):  # #4 - Emergency & Safety Solutions (Authority View)
+    st.markdown(f"<div class='section-header'>{t['sos_nav']}</div>", unsafe_allow_html=True)
+    st.info("Monitor SOS Alerts and Dispatch ")
+    if st.session_state.drone_dispatched:
+        st.success(t['drone_dispatch'])
+        if st.button("Mark Drone Returned"):
+            set_flag('drone_dispatched', False)
+            st.rerun()
+    show_map(temple, 'medical')
+    posts = nearest_facilities(temple, 'medical', 10)
+    if not posts.empty:
+        st.dataframe(posts[['facility_id', 'name', 'capacity', 'distance_m']], hide_index=True)
+
+def authority_performance(temple, t, lang):  # Ops - where rerun time goes (spans are process-wide)
+    st.markdown("<div class='section-header'>Performance</div>", unsafe_allow_html=True)
+    rows = SPANS.summary()
+    if not rows:
+        st.info("No spans recorded yet.")
+        return
+    with st.expander("Startup"):
+        st.json(get_startup().stats())
+    perf_df = pd.DataFrame(rows)
+    st.dataframe(perf_df, hide_index=True)
+    span = st.selectbox("Latency histogram", perf_df['span'], key='perf_span')
+    buckets = SPANS.buckets(span)
+    st.bar_chart(pd.Series(list(buckets.values()), index=[f"{i:02d} {k}" for i, k in enumerate(buckets)], name='calls'))
+    col1, col2 = st.columns(2)
+    col1.download_button("Prometheus metrics", SPANS.to_prometheus(), file_name='yatra_spans.prom', mime='text/plain')
+    col2.caption(f"Scrape: {get_status_api().url()}/metrics")
+
+PILGRIM_SECTIONS = {  # Translation key -> renderer
+    'home_info': pilgrim_home, 'join_queue': pilgrim_queue, 'sos_nav': pilgrim_sos, 'surveillance': pilgrim_surveillance,
+    'traffic': pilgrim_traffic, 'accessibility': pilgrim_accessibility, 'medical_map': pilgrim_medical,
+    'prediction': pilgrim_prediction,  # Added dedicated prediction tab for usability
+}
+AUTHORITY_SECTIONS = {
+    'prediction': authority_prediction, 'surveillance': authority_surveillance, 'active_queues': authority_queues,
+    'barricades': authority_barricades, 'traffic': authority_traffic, 'Engagement (#6)': authority_engagement,
+    'accessibility': authority_accessibility, 'sos_nav': authority_sos,  # Added SOS for completeness
+    'Performance': authority_performance,
+}
+# YATRA_NAV=tabs restores the old st.tabs layout, where every section body runs on every rerun
+NAV_MODE = os.environ.get('YATRA_NAV', 'lazy')
+
+def render_sections(sections, view, temple, t, lang):
+    if NAV_MODE == 'tabs':
+        for tab, (key, render) in zip(st.tabs([t.get(k, k) for k in sections]), sections.items()):
+            with tab, SPANS.span(f"section/{view}/{key}"):
+                render(temple, t, lang)
+        return
+    # Only the selected section executes; the choice is kept per view so switching back lands where you were
+    active = st.radio(view, list(sections), format_func=lambda k: t.get(k, k), horizontal=True,
+                      key=f"section_{view}", label_visibility='collapsed')
+    with SPANS.span(f"section/{view}/{active}"):
+        sections[active](temple, t, lang)
+
+# Widgets inside sections that are not rendered this run would lose their values; re-assigning keeps them
+for key in [k for k in st.session_state if str(k).startswith('keep_')]:
+    st.session_state[key] = st.session_state[key]
 
 if role == t['pilgrim_app']:
     if st.session_state.user_id is None:
-        st.session_state.user_id = len(st.session_state.queue_data) + 1  # Assign a user ID for tracking
-    tabs = st.tabs([t['home_info'], t['join_queue'], t['sos_nav'], t['surveillance'], t['traffic'], t['accessibility'], t['medical_map'], t['prediction']])  # Added dedicated prediction tab for usability
-    
-    with tabs[0]:  # #6 - Pilgrim Engagement Platforms
-        st.markdown(f"<div class='section-header'>{t['temple_info_wait']}</div>", unsafe_allow_html=True)
-        pred_df = predict_crowd(temple, 3)
-        if not pred_df.empty:
-            st.dataframe(pred_df[['date', 'predicted_footfall']].style.background_gradient(cmap='Blues'))
-        col1, col2, col3 = st.columns(3)
-        with col1: st.success(f"🕐 {t['temple_timings']}")
-        with col2: st.info(f"🏥 {t['facilities']}")
-        with col3: st.error(f"📞 {t['emergency_contacts']}")
-        st.info(f"🗺️ {t['routes']}")
-        st.info(t['current_weather'])
-        folium_static(create_map(temple, 'parking'))
-        if st.session_state.surge_active:
-            st.warning(t['surge_alert'])
-        if st.session_state.crowd_alert_sent:
-            st.warning("🚨 Avoid area - High crowd detected! (#6 Notification)")
-    
-    with tabs[1]:  # #2 - Smart Queue & Ticketing Systems
-        st.markdown(f"<div class='section-header'>{t['virtual_darshan']}</div>", unsafe_allow_html=True)
-        st.info(t['dynamic_slots'])
-        priority = st.checkbox(t['elderly_priority'])
-        if st.button(t['join_btn'], use_container_width=True):
-            msg = join_queue(temple, st.session_state.user_id, priority, lang)
-            st.success(msg)
-            # QR Code Simulation
-            qr_text = f"Pass: {temple}-User{st.session_state.user_id} Slot:{st.session_state.queue_data[-1]['slot']}"
-            fig, ax = plt.subplots(figsize=(4,4))
-            ax.text(0.5, 0.5, qr_text, ha='center', va='center', fontsize=12, bbox=dict(facecolor='white', edgecolor='black', boxstyle='square,pad=1'))
-            ax.axis('off')
-            st.pyplot(fig)
-        if st.button(t['simulate_turn']):
-            st.balloons()
-            st.success(t['your_turn'])
-        if st.session_state.queue_data:
-            q_df = pd.DataFrame([q for q in st.session_state.queue_data if q.get('temple') == temple and q.get('user_id') == st.session_state.user_id])
-            if not q_df.empty:
-                for idx, row in q_df.iterrows():
-                    elapsed = (datetime.now() - row['join_time']).total_seconds() / 60
-                    remaining = max(0, row['est_wait'] - elapsed)
-                    progress = min(1.0, elapsed / row['est_wait'])
-                    st.progress(progress)
-                    st.metric("Wait Left", f"{remaining:.0f} min", f"Slot: {row['slot']}")
-                if st.button(t['refresh_queue']):
-                    st.rerun()  # Real-time update
-    
-    with tabs[2]:  # #4 - Emergency & Safety Solutions
-        st.markdown(f"<div class='section-header'>{t['emergency_sos']}</div>", unsafe_allow_html=True)
-        if st.button(t['press_sos'], type="primary"):
-            st.error(t['sos_sent'])
-            st.session_state.drone_dispatched = True
-            st.success(t['drone_dispatch'])
-            folium_static(create_map(temple, 'drone'))
-    
-    with tabs[3]:  # #3 - IoT & Surveillance Systems
-        st.markdown(f"<div class='section-header'>{t['surveillance']}</div>", unsafe_allow_html=True)
-        if st.button(t['scan_now']):
-            alert, density = simulate_monitoring(temple)
-            fig, ax = plt.subplots(figsize=(6,5))
-            ax.pie([density, 1-density], labels=[t['crowded'], t['safe']], autopct='%1.1f%%', colors=['#ff6b6b', '#4ecdc4'], shadow=True, explode=(0.1, 0))
-            ax.set_title('CCTV Density (#3)')
-            st.pyplot(fig)
-            st.metric("Sensors", f"{density*100:.0f}%", "IoT")
-            st.metric("Drones", "Active", delta="Monitoring")
-            if alert:
-                st.error(t['panic_detected'].format(alert['location']))
-    
-    with tabs[4]:  # #5 - Traffic & Mobility Management
-        st.markdown(f"<div class='section-header'>{t['parking_mobility']}</div>", unsafe_allow_html=True)
-        folium_static(create_map(temple, 'parking'))
-        data = TEMPLE_DATA[temple]
-        st.info(t['empty_spots'].format(int(data['base_footfall']/5000)))
-        st.subheader(t['shuttle_schedule'])
-        schedule = pd.DataFrame({
-            'Time': ['10AM', '12PM', '2PM', '4PM'],
-            'From': [f"{temple} Parking", 'Main Gate', 'Bus Station', 'Approach Road'],
-            'To': ['Temple', f"{temple} Parking", 'Temple', 'Shuttle Hub'],
-            'Status': ['On Time', 'Delayed 5min', 'On Time', 'Police Coordinated']
-        })
-        st.dataframe(schedule.style.background_gradient(cmap='viridis'))
-        st.subheader(t['traffic_flow'])
-        flow = np.random.choice(['Smooth', 'Moderate', 'Congested'])
-        st.metric("Flow Status", flow, "Police Dynamic System")
-    
-    with tabs[5]:  # #7 - Accessibility Features
-        st.markdown(f"<div class='section-header'>{t['voice_guide']}</div>", unsafe_allow_html=True)
-        if st.button('Start Voice-Guided Mode (#7)'):
-            st.info(t['audio_sim'])
-            st.audio("data:audio/wav;base64,UklGRnoGAABXQVZFZm10IBAAAAABAAEAQB8AAEAfAAABAAgAZGF0YQoGAACBhYqFbF1fdJivrJBhNjVgodDbq2EcDbiIAA==", format="audio/wav")
-        st.info("AR Navigation Sim: Priority route highlighted for disabled/elderly.")
-    
-    with tabs[6]:  # #4 - Medical Assistance Mapping (Part of Emergency)
-        st.markdown(f"<div class='section-header'>{t['medical_map']}</div>", unsafe_allow_html=True)
-        folium_static(create_map(temple, 'medical'))
-        st.info("Nearest Aid: 200m - Mapped for Quick Response (#4).")
-    
-    with tabs[7]:  # #1 - Dedicated AI Crowd Prediction for Usability
-        st.markdown(f"<div class='section-header'>{t['prediction']}</div>", unsafe_allow_html=True)
-        pred_df = predict_crowd(temple, 7)
-        if not pred_df.empty:
-            st.dataframe(pred_df.style.background_gradient(cmap='YlOrRd'))
-            fig, ax = plt.subplots(figsize=(10,5))
-            bars = ax.bar([d.strftime('%Y-%m-%d') for d in pred_df['date']], pred_df['predicted_footfall'], color='orange', edgecolor='black')
-            ax.set_title(f'Predicted Footfall - {temple} (#1)')
-            ax.set_ylabel('Footfall')
-            ax.set_xlabel('Date')
-            plt.xticks(rotation=45)
-            st.pyplot(fig)
-
+        st.session_state.user_id = get_queue_engine().next_user_id()  # Assign a user ID for tracking
+    render_sections(PILGRIM_SECTIONS, 'pilgrim', temple, t, lang)
 elif role == t['authority_dashboard']:
-    tabs = st.tabs([t['prediction'], t['surveillance'], t['active_queues'], t['barricades'], t['traffic'], 'Engagement (#6)', t['accessibility'], t['sos_nav']])  # Added SOS for completeness
-    
-    with tabs[0]:  # #1 - AI/ML-based Crowd Prediction Models
-        st.markdown(f"<div class='section-header'>{t['prediction']}</div>", unsafe_allow_html=True)
-        pred_df = predict_crowd(temple, 7)
-        if not pred_df.empty:
-            st.dataframe(pred_df.style.background_gradient(cmap='YlOrRd'))
-            fig, ax = plt.subplots(figsize=(10,5))
-            bars = ax.bar([d.strftime('%Y-%m-%d') for d in pred_df['date']], pred_df['predicted_footfall'], color='orange', edgecolor='black')
-            ax.set_title(f'Surge Forecast - {temple} (#1: Historical/Weather/Holidays/Festivals)')
-            ax.set_ylabel('Footfall')
-            ax.set_xlabel('Date')
-            plt.xticks(rotation=45)
-            st.pyplot(fig)
-            high_surge = pred_df[pred_df['predicted_footfall'] > TEMPLE_DATA[temple]['base_footfall'] * 2]
-            if not high_surge.empty:
-                st.warning(t['surge_alert'].format(high_surge['date'].iloc[0].strftime('%Y-%m-%d')))
-                st.session_state.surge_active = True
-    
-    with tabs[1]:  # #3 - IoT & Surveillance Systems
-        st.markdown(f"<div class='section-header'>{t['surveillance']}</div>", unsafe_allow_html=True)
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button(t['scan_now'], use_container_width=True):
-                st.session_state.alert, st.session_state.density = simulate_monitoring(temple)
-                fig, ax = plt.subplots()
-                ax.pie([st.session_state.density, 1-st.session_state.density], labels=[t['crowded'], t['safe']], autopct='%1.1f%%', colors=['#ff6b6b', '#4ecdc4'], shadow=True, explode=(0.1, 0))
-                st.pyplot(fig)
-        with col2:
-            st.metric("IoT Sensors", f"{st.session_state.density*100:.0f}% Density")
-            st.metric("CCTV Feeds", "Live", "AI Analytics")
-            st.metric("Drones", "4/5 Deployed", "Auto Patrol")
-        if st.session_state.alert:
-            st.error(t['panic_detected'].format(st.session_state.alert['location']))
-            st.session_state.crowd_alert_sent = True
-    
-    with tabs[2]:  # #2 + #4 - Smart Queue & Emergency Alerts
-        st.markdown(f"<div class='section-header'>{t['active_queues']}</div>", unsafe_allow_html=True)
-        q_df = pd.DataFrame([q for q in st.session_state.queue_data if q.get('temple') == temple])
-        if not q_df.empty:
-            st.dataframe(q_df.style.background_gradient(cmap='coolwarm'))
-        a_df = pd.DataFrame([a for a in st.session_state.alerts if a.get('temple') == temple])
-        if not a_df.empty:
-            st.dataframe(a_df.style.highlight_max(axis=0))
-            if st.button(t['dispatch'], type="primary"):
-                st.success(t['dispatched'])
-        else:
-            st.info(t['no_alerts'])
-    
-    with tabs[3]:  # #4 - Smart Barricade Systems
-        st.markdown(f"<div class='section-header'>{t['barricades']}</div>", unsafe_allow_html=True)
-        statuses = {'Main Gate': 'Locked (High Surge)', 'Darshan Hall': 'Open', 'Exit': 'Active'}
-        for loc, stat in statuses.items():
-            color = 'red' if 'Locked' in stat else 'green' if 'Open' in stat else 'orange'
-            st.metric(loc, stat, delta="AI-Enabled (#4)")
-    
-    with tabs[4]:  # #5 - Traffic & Mobility Management
-        st.markdown(f"<div class='section-header'>{t['parking_mobility']}</div>", unsafe_allow_html=True)
-        folium_static(create_map(temple, 'parking'))
-        data = TEMPLE_DATA[temple]
-        st.info(t['empty_spots'].format(int(data['base_footfall']/5000)))
-        st.subheader(t['shuttle_schedule'])
-        schedule = pd.DataFrame({
-            'Time': ['10AM', '12PM', '2PM'],
-            'Route': [f"{temple} Parking → Temple", 'Gate → Parking', 'Station → Temple'],
-            'Coord': ['Police Cleared', 'On Time', 'Dynamic Reroute']
-        })
-        st.dataframe(schedule.style.background_gradient(cmap='viridis'))
-        st.subheader(t['traffic_flow'])
-        light = np.random.choice(['🟢 Green', '🟡 Yellow', '🔴 Red'])
-        st.metric("Flow", light, "City Police System")
-    
-    with tabs[5]:  # #6 - Pilgrim Engagement Platforms
-        st.markdown(f"<div class='section-header'>Pilgrim Engagement </div>", unsafe_allow_html=True)
-        col1, col2, col3 = st.columns(3)
-        q_df = pd.DataFrame([q for q in st.session_state.queue_data if q.get('temple') == temple])
-        col1.metric("Avg Wait Time", f"{np.mean(q_df['est_wait']):.0f} min" if not q_df.empty else "N/A")
-        col2.metric("Notifications Sent", int(st.session_state.crowd_alert_sent) + int(st.session_state.surge_active))
-        col3.metric("Active Pilgrims", len(q_df))
-        st.info(f"{t['temple_timings']} | {t['routes']} | {t['facilities']} | {t['emergency_contacts']}")
-    
-    with tabs[6]:  # #7 - Accessibility Features
-        st.markdown(f"<div class='section-header'>{t['accessibility']}</div>", unsafe_allow_html=True)
-        st.checkbox("Enable Priority Queues ")
-        if st.button("Broadcast Voice Navigation "):
-            st.success("Voice Guide Broadcasted to Devices ")
-            st.info(t['audio_sim'])
-    
-    with tabs[7]:  # #4 - Emergency & Safety Solutions (Authority View)
-        st.markdown(f"<div class='section-header'>{t['sos_nav']}</div>", unsafe_allow_html=True)
-        st.info("Monitor SOS Alerts and Dispatch ")
-        if st.session_state.drone_dispatched:
-            st.success(t['drone_dispatch'])
-        folium_static(create_map(temple, 'medical'))
+    render_sections(AUTHORITY_SECTIONS, 'authority', temple, t, lang)
+
+startup.mark('first_section')
 
 st.markdown("---")
 st.caption(t['footer'])
-
-# Auto-refresh for real-time usability (every 30 seconds)
-time.sleep(30)
-st.rerun()
+SPANS.observe('script', time.perf_counter() - run_start)
+startup.finish()
@@ -0,0 +1,223 @@
+# Performance Benchmarks - headless app reruns (AppTest) and hot functions, compared against a stored baseline
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stderr
+from datetime import datetime
+
+import numpy as np
+
+from charts import rss_mb
+from map_cache import MapCache
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+ROLES = {'pilgrim': 0, 'authority': 1}  # View -> index in the "View As" selectbox
+LANGS = ['English', 'Gujarati', 'Hindi']
+WALL_TOLERANCE = 1.25    # Flag when p50 wall time exceeds baseline by 25%...
+WALL_FLOOR_MS = 2.0      # ...and by at least this much, so sub-millisecond noise never trips it
+ALLOC_TOLERANCE = 1.5
+ALLOC_FLOOR_KB = 256
+
+
+def summarize(samples, alloc_kb=None, rss_growth_mb=None):
+    ms = np.array(samples) * 1000
+    out = {'runs': len(ms), 'wall_ms_mean': round(float(ms.mean()), 3), 'wall_ms_p50': round(float(np.percentile(ms, 50)), 3),
+           'wall_ms_p95': round(float(np.percentile(ms, 95)), 3)}
+    if alloc_kb is not None:
+        out['alloc_peak_kb'] = round(alloc_kb, 1)
+    if rss_growth_mb is not None:
+        out['rss_growth_mb'] = round(rss_growth_mb, 2)
+    return out
+
+
+def traced(fn):
+    # Peak Python allocations (KB) of one call
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def bench_reruns(temples, langs, reruns):
+    from streamlit.testing.v1 import AppTest
+    from app import AUTHORITY_SECTIONS, PILGRIM_SECTIONS
+    results = {}
+    for view, role_idx in ROLES.items():
+        sections = PILGRIM_SECTIONS if view == 'pilgrim' else AUTHORITY_SECTIONS
+        for temple in temples:
+            for lang in langs:
+                at = AppTest.from_file(APP, default_timeout=300)
+                at.run()
+                at.sidebar.selectbox[0].set_value(lang).run()
+                at.sidebar.selectbox[1].set_value(temple).run()
+                at.sidebar.selectbox[2].select_index(role_idx).run()
+                for section in sections:
+                    at.radio(key=f"section_{view}").set_value(section).run()  # First visit warms caches
+                    rss0 = rss_mb()
+                    samples = []
+                    for _ in range(reruns):
+                        start = time.perf_counter()
+                        at.run()
+                        samples.append(time.perf_counter() - start)
+                    growth = rss_mb() - rss0
+                    if at.exception:
+                        raise RuntimeError(f"{view}/{temple}/{lang}/{section}: {at.exception[0].value}")
+                    name = f"rerun/{view}/{temple}/{lang}/{section}"
+                    results[name] = summarize(samples, traced(at.run), growth)
+                    print(f"{name:<60} p50 {results[name]['wall_ms_p50']:>8.1f} ms", flush=True)
+    return results
+
+
+def bench_functions(repeat, queue_sizes, alert_sizes):
+    with redirect_stderr(io.StringIO()):  # Bare-mode import warnings
+        import app
+    temple = next(iter(app.TEMPLE_DATA))
+    results = {}
+
+    def record(name, fn):
+        fn()
+        rss0 = rss_mb()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        results[name] = summarize(samples, traced(fn), rss_mb() - rss0)
+        print(f"{name:<60} p50 {results[name]['wall_ms_p50']:>8.3f} ms", flush=True)
+
+    record('load_and_train_model', lambda: app.load_and_train_model(temple))
+    cold = []
+    for _ in range(max(3, repeat // 10)):  # Fresh registry each time: artifact load from disk
+        start = time.perf_counter()
+        app.ModelRegistry().get(temple, app.TEMPLE_DATA[temple]['base_footfall'])
+        cold.append(time.perf_counter() - start)
+    results['load_and_train_model/disk'] = summarize(cold)
+    record('predict_crowd', lambda: app.predict_crowd(temple, 7))
+    record('create_map', lambda: app.create_map(temple, 'medical'))
+    # show_map's path: a fresh cache renders (cold), the app's shared cache answers from memory (warm)
+    facilities = app.CATALOG.markers(temple)
+    record('map_cache/cold', lambda: MapCache().get(temple, app.TEMPLE_DATA[temple], 'medical', False, False, facilities))
+    record('map_cache/warm', lambda: app.get_map_cache().get(temple, app.TEMPLE_DATA[temple], 'medical', False, False, facilities))
+
+    engine = app.get_queue_engine()
+    for size in queue_sizes:
+        while engine.waiting_count(temple) < size:
+            engine.join(temple, {'user_id': -1, 'join_time': datetime.now(), 'priority': False, 'est_wait': 30,
+                                 'slot': '10:00', 'slot_type': 'Free', 'lang': 'English'})
+        record(f"join_queue/queue={size}", lambda: app.join_queue(temple, 0))
+
+    # What grows with alert volume: the dashboard's recent-alerts read and the Active Queues fragment that renders it.
+    # Fragments skip their body outside a script run, so the undecorated function is timed
+    store = app.get_alert_store()
+    t = app.TRANSLATIONS['English']
+    for size in alert_sizes:
+        while store.raised < size:
+            store.add(temple, f"Zone {store.raised}", 'Panic Detected', 'High')
+        record(f"alerts_recent/alerts={size}", lambda: store.recent(temple, limit=50))
+        record(f"queues_and_alerts/alerts={size}", lambda: app.queues_and_alerts.__wrapped__(temple, t))
+    return results
+
+
+STARTUP_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=300)
+at.run()
+from perf import process_uptime
+print(json.dumps({'first_run': time.perf_counter() - start, 'process': process_uptime(),
+                  'heavy': [m for m in ('sklearn', 'joblib', 'matplotlib', 'folium') if m in sys.modules]}))
+'''
+
+
+def bench_startup(runs):
+    # Time-to-first-render of a brand-new process (cold replica), using whatever artifacts are on disk
+    first, process = [], []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', STARTUP_PROBE, APP], capture_output=True, text=True,
+                             cwd=os.path.dirname(APP), check=True).stdout
+        probe = json.loads(out.strip().splitlines()[-1])
+        first.append(probe['first_run'])
+        process.append(probe['process'] or probe['first_run'])
+    results = {'startup/first_run': summarize(first), 'startup/process_to_first_render': summarize(process)}
+    print(f"{'startup/first_run':<60} p50 {results['startup/first_run']['wall_ms_p50']:>8.1f} ms "
+          f"(heavy modules loaded: {', '.join(probe['heavy']) or 'none'})", flush=True)
+    return results
+
+
+def compare(results, baseline):
+    # Entries slower/heavier than the baseline beyond tolerance and noise floors
+    flagged = []
+    for name, cur in results.items():
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            continue
+        if cur['wall_ms_p50'] > base['wall_ms_p50'] * WALL_TOLERANCE and cur['wall_ms_p50'] - base['wall_ms_p50'] > WALL_FLOOR_MS:
+            flagged.append(f"{name}: wall p50 {base['wall_ms_p50']:.2f} -> {cur['wall_ms_p50']:.2f} ms")
+        if 'alloc_peak_kb' in cur and 'alloc_peak_kb' in base and cur['alloc_peak_kb'] > base['alloc_peak_kb'] * ALLOC_TOLERANCE \
+                and cur['alloc_peak_kb'] - base['alloc_peak_kb'] > ALLOC_FLOOR_KB:
+            flagged.append(f"{name}: alloc peak {base['alloc_peak_kb']:.0f} -> {cur['alloc_peak_kb']:.0f} KB")
+    return flagged
+
+
+def meta():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(APP)).stdout.strip()
+    except OSError:
+        commit = None
+    import streamlit
+    return {'time': datetime.now().isoformat(timespec='seconds'), 'commit': commit, 'python': platform.python_version(),
+            'streamlit': streamlit.__version__, 'machine': platform.machine(), 'cpus': os.cpu_count()}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Headless rerun and function benchmarks with baseline regression checks.')
+    parser.add_argument('--suite', choices=['all', 'reruns', 'functions', 'startup'], default='all')
+    parser.add_argument('--startup-runs', type=int, default=3, help='Fresh processes timed to first render')
+    parser.add_argument('--reruns', type=int, default=5, help='Timed reruns per role/temple/language/section')
+    parser.add_argument('--repeat', type=int, default=50, help='Timed calls per function benchmark')
+    parser.add_argument('--quick', action='store_true', help='One temple in English only')
+    parser.add_argument('--queue-sizes', type=int, nargs='+', default=[0, 1000, 10000, 100000])
+    parser.add_argument('--alert-sizes', type=int, nargs='+', default=[0, 100, 1000, 10000])
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--baseline', default='bench_baseline.json')
+    parser.add_argument('--update-baseline', action='store_true', help='Write these results as the new baseline')
+    args = parser.parse_args()
+
+    # Benchmark tickets and alerts go to a throwaway event log, never the app's persisted state
+    os.environ.setdefault('YATRA_EVENT_LOG', os.path.join(tempfile.mkdtemp(prefix='yatra-bench-'), 'events.db'))
+    from temples import TEMPLE_DATA
+    temples = list(TEMPLE_DATA)[:1] if args.quick else list(TEMPLE_DATA)
+    langs = LANGS[:1] if args.quick else LANGS
+    results = {}
+    if args.suite in ('all', 'startup'):
+        results.update(bench_startup(args.startup_runs))
+    if args.suite in ('all', 'functions'):
+        results.update(bench_functions(args.repeat, args.queue_sizes, args.alert_sizes))
+    if args.suite in ('all', 'reruns'):
+        results.update(bench_reruns(temples, langs, args.reruns))
+    report = {'meta': meta(), 'results': results}
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=1)
+    print(f"wrote {len(results)} results to {args.out}")
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=1)
+        print(f"baseline updated: {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            flagged = compare(results, json.load(f))
+        for line in flagged:
+            print(f"REGRESSION {line}")
+        print(f"{len(flagged)} regressions against {args.baseline}")
+        sys.exit(1 if flagged else 0)
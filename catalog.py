@@ -0,0 +1,197 @@
+# Temple & Facility Catalog (#4, #5, #7) - temples, parking, medical posts, gates from CSV/Parquet with a spatial grid index
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+CATALOG_DIR = os.environ.get('YATRA_CATALOG_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+EARTH_RADIUS_M = 6371000.0
+CELL_METERS = 500.0           # Grid cell edge; queries inspect only the cells a search circle overlaps
+FACILITY_KINDS = ('parking', 'medical', 'gate', 'drone_base')
+
+
+def _read_table(directory, name):
+    # Parquet when present (needs pyarrow), CSV otherwise
+    parquet = os.path.join(directory, f"{name}.parquet")
+    if os.path.exists(parquet):
+        try:
+            return pd.read_parquet(parquet)
+        except ImportError:
+            pass
+    return pd.read_csv(os.path.join(directory, f"{name}.csv"))
+
+
+def haversine_m(lat, lng, lats, lngs):
+    lat, lng = math.radians(lat), math.radians(lng)
+    lats, lngs = np.radians(lats), np.radians(lngs)
+    a = np.sin((lats - lat) / 2) ** 2 + math.cos(lat) * np.cos(lats) * np.sin((lngs - lng) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+class GridIndex:
+    # Points bucketed into ~CELL_METERS cells of latitude; longitude cells are the same size in degrees,
+    # so they are narrower in metres away from the equator - queries widen their longitude span to match
+    def __init__(self, lats, lngs, cell_m=CELL_METERS):
+        self.lats = np.asarray(lats, dtype=float)
+        self.lngs = np.asarray(lngs, dtype=float)
+        self.cell_deg = cell_m / (EARTH_RADIUS_M * math.pi / 180)
+        self.cell_m = cell_m
+        rows = np.floor(self.lats / self.cell_deg).astype(np.int64)
+        cols = np.floor(self.lngs / self.cell_deg).astype(np.int64)
+        self.cells = {}
+        order = np.lexsort((cols, rows))
+        keys = np.stack([rows[order], cols[order]], axis=1)
+        bounds = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+        for idx in np.split(order, bounds):
+            if len(idx):
+                self.cells[(int(rows[idx[0]]), int(cols[idx[0]]))] = idx
+
+    @staticmethod
+    def _ring(row, col, r, col_scale):
+        # Cells r rows / ceil(r * col_scale) columns out from (row, col) that ring r - 1 did not cover
+        c = math.ceil(r * col_scale)
+        inner = math.ceil((r - 1) * col_scale) if r else -1
+        return [(row + dr, col + dc) for dr in range(-r, r + 1) for dc in range(-c, c + 1)
+                if abs(dr) == r or abs(dc) > inner]
+
+    def query(self, lat, lng, n=5, radius_m=None, mask=None, max_rings=400):
+        # (indices, distances_m) of the nearest n points within radius_m, nearest first; mask filters candidates
+        row = math.floor(lat / self.cell_deg)
+        col = math.floor(lng / self.cell_deg)
+        col_scale = 1 / max(math.cos(math.radians(lat)), 1e-6)
+        if radius_m is not None:  # Bounded search: every cell the circle can touch, in one pass
+            rings = [min(max_rings, math.ceil(radius_m / self.cell_m) + 1)]
+            keys = [(row + dr, col + dc) for dr in range(-rings[0], rings[0] + 1)
+                    for dc in range(-math.ceil(rings[0] * col_scale), math.ceil(rings[0] * col_scale) + 1)]
+        else:
+            rings = range(max_rings + 1)
+        cand = np.empty(0, dtype=np.int64)
+        dist = np.empty(0)
+        for r in rings:
+            hits = [self.cells[k] for k in (keys if radius_m is not None else self._ring(row, col, r, col_scale))
+                    if k in self.cells]
+            if hits:
+                new = np.concatenate(hits)
+                if mask is not None:
+                    new = new[mask[new]]
+                cand = np.concatenate([cand, new])
+                dist = np.concatenate([dist, haversine_m(lat, lng, self.lats[new], self.lngs[new])])
+            if radius_m is None and len(cand) >= n:
+                order = np.argsort(dist, kind='stable')[:n]
+                if dist[order[-1]] <= max(r - 1, 0) * self.cell_m:  # Nothing in an unvisited ring can be closer
+                    return cand[order], dist[order]
+        if radius_m is not None:
+            keep = dist <= radius_m
+            cand, dist = cand[keep], dist[keep]
+        order = np.argsort(dist, kind='stable')[:n]
+        return cand[order], dist[order]
+
+
+class Catalog:
+    def __init__(self, temples, facilities):
+        self.temples = temples.set_index('name', drop=False)
+        self.facilities = facilities.reset_index(drop=True)
+        self.facilities['capacity'] = self.facilities['capacity'].fillna(0).astype(int)
+        self.free = self.facilities['capacity'].to_numpy().copy()  # Live free capacity (parking spaces, beds)
+        self.index = GridIndex(self.facilities['lat'], self.facilities['lng'])
+        self._kind = self.facilities['kind'].to_numpy()
+        self._by_temple = {t: g.index.to_numpy() for t, g in self.facilities.groupby('temple')}
+        self._kind_mask = {k: self._kind == k for k in np.unique(self._kind)}
+        self._markers = {}
+
+    def temple_data(self):
+        # {name: {'lat', 'lng', 'base_footfall', ...}} - the TEMPLE_DATA shape, dropping empty optional columns
+        rows = self.temples.drop(columns=['name', 'note'], errors='ignore').to_dict('index')
+        return {name: {k: v for k, v in row.items() if not (isinstance(v, float) and math.isnan(v))}
+                for name, row in rows.items()}
+
+    def facilities_for(self, temple, kind=None):
+        idx = self._by_temple.get(temple, np.array([], dtype=np.int64))
+        if kind is not None:
+            idx = idx[self._kind[idx] == kind]
+        return self.facilities.loc[idx].assign(free=self.free[idx])
+
+    def nearest(self, lat, lng, kind=None, n=5, radius_m=None, available_only=False):
+        # DataFrame of the nearest n facilities (optionally one kind / with free capacity) with distance_m
+        mask = None if kind is None else self._kind_mask.get(kind, np.zeros(len(self._kind), dtype=bool))
+        if available_only:
+            mask = self.free > 0 if mask is None else mask & (self.free > 0)
+        idx, dist = self.index.query(lat, lng, n, radius_m, mask)
+        return self.facilities.loc[idx].assign(free=self.free[idx], distance_m=np.round(dist, 1))
+
+    def set_free(self, facility_ids, free):
+        pos = pd.Index(self.facilities['facility_id']).get_indexer(list(facility_ids))
+        self.free[pos[pos >= 0]] = np.asarray(free)[pos >= 0]
+
+    def markers(self, temple):
+        # (lat, lng, popup, kind) for map layers; capacity, not live occupancy, so cached maps stay valid
+        rows = self._markers.get(temple)
+        if rows is None:
+            df = self.facilities.loc[self._by_temple.get(temple, [])]
+            rows = self._markers[temple] = [(float(r.lat), float(r.lng), f"{r.name} ({r.capacity})" if r.capacity else r.name, r.kind)
+                                            for r in df.itertuples(index=False)]
+        return rows
+
+
+def load_catalog(directory=CATALOG_DIR):
+    return Catalog(_read_table(directory, 'temples'), _read_table(directory, 'facilities'))
+
+
+def synthesize(n_temples, per_temple=20, seed=0):
+    # Random catalog over Gujarat's bounding box, for index benchmarks
+    rng = np.random.default_rng(seed)
+    temples = pd.DataFrame({'name': [f"Temple{i}" for i in range(n_temples)],
+                            'lat': rng.uniform(20.1, 24.7, n_temples), 'lng': rng.uniform(68.2, 74.5, n_temples),
+                            'base_footfall': rng.integers(2000, 50000, n_temples)})
+    n = n_temples * per_temple
+    owner = np.repeat(np.arange(n_temples), per_temple)
+    facilities = pd.DataFrame({
+        'facility_id': [f"F{i}" for i in range(n)], 'temple': temples['name'].to_numpy()[owner],
+        'kind': rng.choice(FACILITY_KINDS, n, p=[0.4, 0.25, 0.3, 0.05]), 'name': [f"Facility {i}" for i in range(n)],
+        'lat': temples['lat'].to_numpy()[owner] + rng.normal(0, 0.004, n),
+        'lng': temples['lng'].to_numpy()[owner] + rng.normal(0, 0.004, n),
+        'capacity': rng.integers(0, 2000, n),
+    })
+    return temples, facilities
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Nearest-facility query latency on a synthetic catalog (grid index vs brute force).')
+    parser.add_argument('--temples', type=int, default=500)
+    parser.add_argument('--per-temple', type=int, default=20)
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--write', metavar='DIR', help='Also write the synthetic catalog as CSV to DIR')
+    args = parser.parse_args()
+    temples, facilities = synthesize(args.temples, args.per_temple)
+    if args.write:
+        os.makedirs(args.write, exist_ok=True)
+        temples.to_csv(os.path.join(args.write, 'temples.csv'), index=False)
+        facilities.to_csv(os.path.join(args.write, 'facilities.csv'), index=False)
+    start = time.perf_counter()
+    cat = Catalog(temples, facilities)
+    build = time.perf_counter() - start
+    rng = np.random.default_rng(1)
+    pts = temples[['lat', 'lng']].to_numpy()[rng.integers(0, len(temples), args.queries)] + rng.normal(0, 0.003, (args.queries, 2))
+    medical = cat._kind_mask['medical']
+    start = time.perf_counter()
+    for lat, lng in pts:
+        cat.index.query(lat, lng, 3, 1000, medical)
+    grid = (time.perf_counter() - start) / args.queries
+    start = time.perf_counter()
+    for lat, lng in pts[:500]:
+        d = haversine_m(lat, lng, cat.index.lats, cat.index.lngs)
+        d[~medical | (d > 1000)] = np.inf
+        np.argsort(d)[:3]
+    brute = (time.perf_counter() - start) / 500
+    # Same answers as brute force
+    for lat, lng in pts[:200]:
+        idx, _ = cat.index.query(lat, lng, 3, 1000, medical)
+        d = haversine_m(lat, lng, cat.index.lats, cat.index.lngs)
+        d[~medical | (d > 1000)] = np.inf
+        expect = [i for i in np.argsort(d, kind='stable')[:3] if np.isfinite(d[i])]
+        assert sorted(idx.tolist()) == sorted(expect), (idx, expect)
+    print(f"{len(facilities):,} facilities at {len(temples)} temples, index built in {build * 1000:.1f} ms; "
+          f"nearest 3 medical within 1 km: grid {grid * 1e6:.0f} us vs brute force {brute * 1e6:.0f} us per query")
@@ -0,0 +1,139 @@
+# Chart Rendering (#1, #2, #3) - PNGs drawn on standalone Agg figures (never registered with pyplot) and cached
+import argparse
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from perf import SPANS
+
+MAX_CACHE_BYTES = 32 * 2**20
+DPI = 150
+
+
+def _figure(figsize):
+    # matplotlib is imported by the first chart drawn, not at app start
+    from matplotlib.figure import Figure
+    return Figure(figsize=figsize)
+
+
+def _png(fig):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    FigureCanvasAgg(fig)
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=DPI, bbox_inches='tight')
+    return buf.getvalue()  # fig has no pyplot manager, so it is freed with the last reference
+
+
+def draw_pass(text):
+    fig = _figure((4, 4))
+    ax = fig.subplots()
+    ax.text(0.5, 0.5, text, ha='center', va='center', fontsize=12, bbox=dict(facecolor='white', edgecolor='black', boxstyle='square,pad=1'))
+    ax.axis('off')
+    return _png(fig)
+
+
+def draw_density_pie(density, labels, title=None, figsize=(6, 5)):
+    fig = _figure(figsize)
+    ax = fig.subplots()
+    ax.pie([density, 1 - density], labels=labels, autopct='%1.1f%%', colors=['#ff6b6b', '#4ecdc4'], shadow=True, explode=(0.1, 0))
+    if title:
+        ax.set_title(title)
+    return _png(fig)
+
+
+def draw_forecast_bars(dates, values, title):
+    fig = _figure((10, 5))
+    ax = fig.subplots()
+    ax.bar(dates, values, color='orange', edgecolor='black')
+    ax.set_title(title)
+    ax.set_ylabel('Footfall')
+    ax.set_xlabel('Date')
+    ax.tick_params(axis='x', labelrotation=45)
+    return _png(fig)
+
+
+CHARTS = {'pass': draw_pass, 'density_pie': draw_density_pie, 'forecast_bars': draw_forecast_bars}
+
+
+class ChartCache:
+    # LRU of rendered PNG bytes keyed by a hash of the chart kind and its inputs, bounded by total bytes
+    def __init__(self, max_bytes=MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, kind, *args, **kwargs):
+        key = hashlib.sha1(repr((kind, args, sorted(kwargs.items()))).encode()).hexdigest()
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return png
+        with SPANS.span(f"chart/{kind}"):
+            png = CHARTS[kind](*args, **kwargs)
+        with self._lock:
+            self.misses += 1
+            if key not in self._entries:
+                self._entries[key] = png
+                self._bytes += len(png)
+            while self._bytes > self.max_bytes and self._entries:
+                _, old = self._entries.popitem(last=False)
+                self._bytes -= len(old)
+                self.evictions += 1
+        return png
+
+    def stats(self):
+        return {'entries': len(self._entries), 'bytes': self._bytes, 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+def rss_mb():
+    # Current resident set size (Linux); falls back to the peak on other platforms
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+if __name__ == '__main__':
+    import random
+    from datetime import date, timedelta
+    parser = argparse.ArgumentParser(description='Soak test: simulated hours of dashboard reruns, reporting RSS over time.')
+    parser.add_argument('--hours', type=float, default=24)
+    parser.add_argument('--rerun-seconds', type=int, default=30, help='Simulated interval between reruns')
+    parser.add_argument('--legacy', action='store_true', help='Draw with pyplot.subplots and never close, like the old app')
+    args = parser.parse_args()
+    cache = ChartCache()
+    reruns = int(args.hours * 3600 / args.rerun_seconds)
+    per_hour = max(1, 3600 // args.rerun_seconds)
+    if args.legacy:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    for i in range(reruns):
+        day = date(2025, 10, 4) + timedelta(days=i // (24 * per_hour))
+        dates = [str(day + timedelta(days=k)) for k in range(7)]
+        values = [50000 + 1000 * k for k in range(7)]
+        density = round(random.uniform(0.3, 0.9), 3)
+        if args.legacy:
+            fig, ax = plt.subplots(figsize=(10, 5))
+            ax.bar(dates, values)
+            fig.savefig(io.BytesIO(), format='png')
+            fig, ax = plt.subplots()
+            ax.pie([density, 1 - density])
+            fig.savefig(io.BytesIO(), format='png')
+        else:
+            cache.render('forecast_bars', dates, values, 'Predicted Footfall - Somnath (#1)')
+            cache.render('density_pie', density, ('Crowded', 'Safe'))
+        if i % per_hour == 0:
+            figs = len(plt.get_fignums()) if args.legacy else 0
+            print(f"hour {i // per_hour:>3}: rss {rss_mb():7.1f} MB  pyplot figures {figs:>5}  cache {cache.stats()}", flush=True)
+    print(f"done: {reruns} reruns, rss {rss_mb():.1f} MB")
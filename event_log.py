@@ -0,0 +1,293 @@
+# Event Log (#2, #3, #4) - durable append-only record of tickets, alerts and flags in SQLite (WAL), replayed on restart
+import argparse
+import os
+import pickle
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+from alerts import MAX_ALERTS
+from queue_engine import FINISHED_HISTORY
+
+PATH = os.environ.get('YATRA_EVENT_LOG', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'state', 'events.db'))
+BATCH_SIZE = 5000             # Events per write transaction at most
+SNAPSHOT_EVENTS = 100000      # Snapshot after this many events...
+SNAPSHOT_SECONDS = 300        # ...or this long after the last one, whichever comes first
+TICKET_EVENTS = ('join', 'served', 'cancelled')
+
+# One row per write batch (a log segment): a single pickle of [(time, kind, payload), ...] is far cheaper than a row per event
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (last_seq INTEGER PRIMARY KEY, first_seq INTEGER NOT NULL, time REAL NOT NULL, events BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS snapshots (seq INTEGER PRIMARY KEY, time REAL NOT NULL, state BLOB NOT NULL);
+"""
+
+
+class LogState:
+    # What a restart needs: live tickets plus the same bounded history the engine and alert store keep
+    def __init__(self):
+        self.tickets = {}       # ticket_id -> latest ticket dict
+        self.finished = {}      # temple -> deque of finished ticket_ids, oldest first
+        self.alerts = OrderedDict()  # alert_id -> latest alert dict, oldest first
+        self.flags = {}
+        self.flag_times = {}    # name -> unix time the latest value was set
+
+    def apply(self, kind, payload):
+        if kind in TICKET_EVENTS:
+            self.tickets[payload['ticket_id']] = payload
+            if kind != 'join':
+                finished = self.finished.setdefault(payload['temple'], deque())
+                finished.append(payload['ticket_id'])
+                while len(finished) > FINISHED_HISTORY:
+                    self.tickets.pop(finished.popleft(), None)
+        elif kind == 'alert':
+            self.alerts[payload['alert_id']] = payload  # A coalesced repeat keeps its original position
+            while len(self.alerts) > MAX_ALERTS:
+                self.alerts.popitem(last=False)
+        elif kind == 'flag':
+            self.flags[payload['name']] = payload['value']
+            self.flag_times[payload['name']] = payload.get('time', 0.0)
+
+    def flag(self, name, ttl=None, now=None):
+        # Latest value and when it was set; a set flag older than ttl seconds reads as cleared
+        value, when = self.flags.get(name, False), self.flag_times.get(name, 0.0)
+        if value and ttl is not None and (time.time() if now is None else now) - when > ttl:
+            return False, when
+        return value, when
+
+
+class EventLog:
+    # append() only enqueues; a writer thread batches events into SQLite, folds them into LogState and snapshots it.
+    # snapshot_events=0 turns automatic snapshots off. synchronous=NORMAL under WAL: a crashed app loses nothing committed, a power cut at most the last batch.
+    def __init__(self, path=PATH, batch_size=BATCH_SIZE, snapshot_events=SNAPSHOT_EVENTS, snapshot_seconds=SNAPSHOT_SECONDS):
+        self.path = path
+        self.batch_size = batch_size
+        self.snapshot_events = snapshot_events
+        self.snapshot_seconds = snapshot_seconds
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._queue = queue.SimpleQueue()
+        self.appended = 0
+        self.written = 0
+        self.batches = 0
+        self.snapshots = 0
+        self.error = None
+        self.state, self.recovery = self._recover()
+        self.seq = self.recovery['last_seq']
+        self._since_snapshot = self.recovery['replayed']
+        self._last_snapshot = time.monotonic()
+        self._writer = threading.Thread(target=self._run, daemon=True, name='event-log')
+        self._writer.start()
+
+    def _recover(self):
+        # Latest snapshot, then every segment after it, in order (snapshots are only taken between segments)
+        start = time.perf_counter()
+        row = self._conn.execute('SELECT seq, state FROM snapshots ORDER BY seq DESC LIMIT 1').fetchone()
+        state, snap_seq = LogState(), 0
+        if row:
+            vars(state).update(pickle.loads(row[1]))
+            snap_seq = row[0]
+        loaded = time.perf_counter() - start
+        last_seq, replayed = snap_seq, 0
+        for last_seq, blob in self._conn.execute('SELECT last_seq, events FROM segments WHERE last_seq > ? ORDER BY last_seq', (snap_seq,)):
+            events = pickle.loads(blob)
+            for _, kind, payload in events:
+                state.apply(kind, payload)
+            replayed += len(events)
+        return state, {'snapshot_seq': snap_seq, 'replayed': replayed, 'last_seq': last_seq,
+                       'snapshot_load_s': round(loaded, 4), 'recovery_s': round(time.perf_counter() - start, 4)}
+
+    def append(self, kind, payload):
+        self.appended += 1
+        self._queue.put((time.time(), kind, payload))
+
+    def record_ticket(self, event, ticket):
+        # QueueEngine listener: runs under the temple lock, so just a shallow copy and an enqueue
+        self.append(event, dict(ticket))
+
+    def record_alert(self, alert):
+        self.append('alert', dict(alert))
+
+    def set_flag(self, name, value):
+        self.append('flag', {'name': name, 'value': value, 'time': time.time()})
+
+    def flush(self, timeout=None):
+        # Block until everything appended so far is committed
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def snapshot(self, timeout=None):
+        done = threading.Event()
+        self._queue.put(('snapshot', done))
+        return done.wait(timeout)
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                item = None
+            batch, waiters, forced = [], [], False
+            while item is not None:
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                elif item[0] == 'snapshot':
+                    waiters.append(item[1])
+                    forced = True
+                else:
+                    batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+            try:
+                if batch:
+                    self._write(batch)
+                due = self.snapshot_events and (self._since_snapshot >= self.snapshot_events or
+                                                time.monotonic() - self._last_snapshot >= self.snapshot_seconds)
+                if self._since_snapshot and (forced or due):
+                    self._snapshot()
+            except (sqlite3.Error, pickle.PicklingError) as e:  # Keep serving; the failed batch is dropped and reported
+                self.error = str(e)
+            for done in waiters:
+                done.set()
+
+    def _write(self, batch):
+        blob = pickle.dumps(batch, pickle.HIGHEST_PROTOCOL)
+        with self._conn:
+            self._conn.execute('INSERT INTO segments (last_seq, first_seq, time, events) VALUES (?, ?, ?, ?)',
+                               (self.seq + len(batch), self.seq + 1, batch[-1][0], blob))
+        self.seq += len(batch)
+        for _, kind, payload in batch:
+            self.state.apply(kind, payload)
+        self.written += len(batch)
+        self.batches += 1
+        self._since_snapshot += len(batch)
+
+    def _snapshot(self):
+        # State as of self.seq; older segments and snapshots are no longer needed for replay
+        blob = pickle.dumps(vars(self.state), pickle.HIGHEST_PROTOCOL)  # Plain containers, not the class, so any entry point can load it
+        with self._conn:
+            self._conn.execute('BEGIN')
+            self._conn.execute('INSERT OR REPLACE INTO snapshots (seq, time, state) VALUES (?, ?, ?)', (self.seq, time.time(), blob))
+            self._conn.execute('DELETE FROM segments WHERE last_seq <= ?', (self.seq,))
+            self._conn.execute('DELETE FROM snapshots WHERE seq < ?', (self.seq,))
+        self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self.snapshots += 1
+        self._since_snapshot = 0
+        self._last_snapshot = time.monotonic()
+
+    def close(self):
+        self.snapshot()
+        self._conn.close()
+
+    def stats(self):
+        return {'path': self.path, 'appended': self.appended, 'written': self.written, 'pending': self.appended - self.written,
+                'batches': self.batches, 'snapshots': self.snapshots, 'last_seq': self.seq, 'recovery': self.recovery,
+                'error': self.error}
+
+
+if __name__ == '__main__':
+    import random
+    from datetime import datetime
+    from alerts import AlertStore
+    from queue_engine import QueueEngine
+    parser = argparse.ArgumentParser(description='Write throughput and restart recovery time of the event log.')
+    parser.add_argument('--events', type=int, default=1000000, help='Synthetic events for the throughput/recovery run')
+    parser.add_argument('--app-events', type=int, default=100000, help='Events from real queue/alert operations for the restore check')
+    parser.add_argument('--path', default='/tmp/yatra-events-bench.db')
+    parser.add_argument('--snapshot-events', type=int, default=SNAPSHOT_EVENTS, help='0 disables automatic snapshots')
+    args = parser.parse_args()
+    temples = ['Somnath', 'Dwarka', 'Ambaji', 'Pavagadh']
+    zones = ['Main Gate', 'Darshan Hall', 'Parking', 'Queue Complex', 'Exit']
+
+    def fresh(path, snapshot_events):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        return EventLog(path, snapshot_events=snapshot_events)
+
+    def on_disk(path):
+        return sum(os.path.getsize(path + s) for s in ('', '-wal') if os.path.exists(path + s)) / 2 ** 20
+
+    # 1. Raw log: joins, serves, alerts and flags in a surge-day mix, appended as fast as the caller can
+    random.seed(0)
+    events, waiting, next_id = [], deque(), 1
+    now = datetime.now()
+    for i in range(args.events):
+        r = random.random()
+        if r < 0.6 or not waiting:
+            ticket = {'temple': random.choice(temples), 'user_id': random.randrange(100000), 'join_time': now, 'priority': r < 0.05,
+                      'lang': 'English', 'slot': '10:00', 'status': 'Waiting', 'est_wait': random.randint(5, 240),
+                      'slot_type': 'Free', 'ticket_id': next_id}
+            next_id += 1
+            waiting.append(ticket)
+            events.append(('join', ticket))
+        elif r < 0.95:
+            events.append(('served', dict(waiting.popleft(), status='Served')))
+        elif r < 0.99:
+            events.append(('alert', {'alert_id': i % 500, 'type': 'Panic Detected', 'location': random.choice(zones),
+                                     'temple': random.choice(temples), 'time': now, 'last_seen': now, 'count': 1, 'severity': 'High'}))
+        else:
+            events.append(('flag', {'name': random.choice(['surge_active', 'drone_dispatched']), 'value': r < 0.995, 'time': time.time()}))
+    for snapshot_events in (args.snapshot_events, 0):
+        log = fresh(args.path, snapshot_events)
+        start = time.perf_counter()
+        for kind, payload in events:
+            log.append(kind, payload)
+        appended = time.perf_counter() - start
+        log.flush()
+        durable = time.perf_counter() - start
+        log._conn.close()  # Simulated crash: no final snapshot
+        print(f"{args.events:,} events, snapshot every {snapshot_events or 'never'}: append {appended / args.events * 1e6:.2f} us/event "
+              f"on the caller, all committed after {durable:.2f}s = {args.events / durable:,.0f} events/s in {log.batches:,} segments, "
+              f"{log.snapshots} snapshots, {on_disk(args.path):.1f} MB on disk")
+        start = time.perf_counter()
+        reopened = EventLog(args.path, snapshot_events=snapshot_events)
+        engine = QueueEngine()
+        engine.restore(reopened.state.tickets.values())
+        rec = reopened.recovery
+        assert sum(engine.waiting_count(t) for t in temples) == len(waiting)
+        print(f"  restart: snapshot #{rec['snapshot_seq']:,} loaded in {rec['snapshot_load_s']:.2f}s + {rec['replayed']:,} events replayed "
+              f"= {rec['recovery_s']:.2f}s; queues rebuilt ({len(waiting):,} waiting) in {time.perf_counter() - start:.2f}s total")
+        reopened._conn.close()
+
+    # 2. Real queue and alert operations, then a restart: recovered queues must call pilgrims in the same order
+    log = fresh(args.path, args.snapshot_events)
+    engine, store = QueueEngine(), AlertStore()
+    engine.subscribe(log.record_ticket)
+    store.subscribe(log.record_alert)
+    produced = 0
+    while produced < args.app_events:
+        r = random.random()
+        temple = random.choice(temples)
+        if r < 0.6:
+            engine.join(temple, {'user_id': random.randrange(100000), 'join_time': datetime.now(), 'priority': r < 0.05,
+                                 'est_wait': random.randint(5, 240), 'slot': '10:00', 'slot_type': 'Free', 'lang': 'English'})
+            produced += 1
+        elif r < 0.9:
+            produced += len(engine.advance(temple))
+        elif r < 0.95:
+            head = engine.head(temple, 1)
+            produced += bool(head and engine.cancel(head[0]['ticket_id']))
+        else:
+            store.add(temple, random.choice(zones), 'Panic Detected', random.choice(['Medium', 'High']), when=datetime.fromtimestamp(produced * 10))
+            produced += 1
+    log.flush()
+    log._conn.close()
+    reopened = EventLog(args.path, snapshot_events=args.snapshot_events)
+    recovered, restored = QueueEngine(), AlertStore()
+    recovered.restore(reopened.state.tickets.values())
+    restored.restore(reopened.state.alerts.values())
+    for temple in temples:
+        assert [t['ticket_id'] for t in recovered.head(temple, 100)] == [t['ticket_id'] for t in engine.head(temple, 100)], temple
+    counts = {a['alert_id']: a['count'] for a in restored.recent(limit=MAX_ALERTS)}
+    assert restored.count() == store.count() and all(counts.get(a['alert_id']) == a['count'] for a in store.recent(limit=MAX_ALERTS))
+    print(f"{produced:,} app events: restored queues and {restored.count():,} alerts match the originals")
@@ -0,0 +1,94 @@
+# Feature Pipeline (#1) - one festival/holiday calendar and vectorized features shared by training and inference
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+# Festival calendar (start, end inclusive) - the single source for history, forecasts and lattice builds
+FESTIVALS = [
+    ('2025-01-14', '2025-01-14'),
+    ('2025-02-26', '2025-02-26'),
+    ('2025-09-29', '2025-09-29'),
+    ('2025-10-07', '2025-10-07'),
+    ('2025-10-20', '2025-10-20'),
+    ('2025-11-01', '2025-11-01'),
+    ('2025-11-15', '2025-11-15'),
+]
+FESTIVAL_DAYS = pd.DatetimeIndex(np.concatenate([pd.date_range(s, e, freq='D').values for s, e in FESTIVALS]))
+
+# Darshan sessions by hour of day, as [start, next start) intervals -> relative share of the day's footfall
+SESSION_STARTS = np.array([0, 5, 8, 12, 17, 21])  # closed, morning aarti, forenoon, afternoon, evening aarti, closed
+SESSION_WEIGHTS = np.array([0.0, 1.6, 1.2, 0.8, 1.4, 0.0])
+
+FEATURES = ['temperature', 'is_festival', 'is_holiday', 'month', 'dayofweek']
+HOURLY_FEATURES = FEATURES + ['hour']
+
+
+def session_of(hour):
+    return np.searchsorted(SESSION_STARTS, hour, side='right') - 1
+
+
+def calendar_features(timestamps):
+    ts = pd.DatetimeIndex(timestamps)
+    is_festival = ts.normalize().isin(FESTIVAL_DAYS)
+    dayofweek = ts.dayofweek.to_numpy()
+    hour = ts.hour.to_numpy()
+    return pd.DataFrame({
+        'is_festival': is_festival.astype(int),
+        'is_holiday': (dayofweek >= 5) | is_festival,
+        'month': ts.month.to_numpy(),
+        'dayofweek': dayofweek,
+        'hour': hour,
+        'session': session_of(hour),
+    }, index=ts)
+
+
+def hourly_profile(hour):
+    # Share of a day's footfall arriving in each hour, from the darshan session bands
+    weights = SESSION_WEIGHTS[session_of(np.arange(24))]
+    return (weights / weights.sum())[np.asarray(hour)]
+
+
+def synthesize_history(base_footfall, start='2024-01-01', end='2026-01-01', freq='D', seed=42, calendar=None):
+    ts = pd.date_range(start=start, end=end, freq=freq)
+    cal = calendar if calendar is not None else calendar_features(ts)
+    n = len(ts)
+    rng = np.random.RandomState(seed)
+    temp = rng.normal(28, 5, n).clip(15, 40)  # Simulated weather
+    noise = rng.normal(0, base_footfall * 0.1, n)
+    is_festival = cal['is_festival'].to_numpy()
+    is_holiday = cal['is_holiday'].to_numpy()
+    footfall = (base_footfall + is_festival * (base_footfall * 2) + is_holiday * (base_footfall * 0.2)
+                + (30 - temp) / 10 * base_footfall * 0.1 + noise).clip(0, base_footfall * 3)
+    if freq != 'D':
+        footfall = footfall * hourly_profile(cal['hour'].to_numpy())
+    df = pd.DataFrame({'date': ts, 'footfall': footfall, 'temperature': temp}, index=np.arange(n))
+    for col in ('is_festival', 'is_holiday', 'month', 'dayofweek', 'hour'):
+        df[col] = cal[col].to_numpy()
+    return df
+
+
+def feature_frame(dates, temperature):
+    # Inference-side features for arbitrary dates/hours with supplied temperatures
+    cal = calendar_features(dates)
+    df = pd.DataFrame({'date': cal.index, 'temperature': temperature})
+    for col in ('is_festival', 'is_holiday', 'month', 'dayofweek', 'hour'):
+        df[col] = cal[col].to_numpy()
+    return df
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the feature pipeline on hourly multi-year history.')
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--temples', type=int, default=24)
+    args = parser.parse_args()
+    ts = pd.date_range('2021-01-01', periods=args.years * 8760, freq='h')
+    start = time.perf_counter()
+    cal = calendar_features(np.tile(ts.values, args.temples))
+    cal_s = time.perf_counter() - start
+    print(f"calendar_features: {len(cal):,} rows in {cal_s:.3f}s")
+    start = time.perf_counter()
+    cal = calendar_features(ts)
+    rows = sum(len(synthesize_history(5000 * (i + 1), ts[0], ts[-1], freq='h', seed=i, calendar=cal)) for i in range(args.temples))
+    print(f"synthesize_history: {rows:,} rows for {args.temples} temples in {time.perf_counter() - start:.3f}s")
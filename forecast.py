@@ -0,0 +1,146 @@
+# Forecast Engine (#1) - one batched prediction per temple over a rolling window, served as slices
+import argparse
+import glob
+import os
+import threading
+import time
+import zlib
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from features import feature_frame
+
+FORECAST_WINDOW_DAYS = 90
+TODAY = date(2025, 10, 4)  # The prototype's calendar day; the app, the prebuild CLI and the status API all forecast from it
+COLUMNS = ['date', 'temperature', 'is_festival', 'is_holiday', 'month', 'dayofweek', 'predicted_footfall']
+
+
+def simulated_weather(temple, dates):
+    # Seeded by temple + window start so the forecast is stable across reruns (was unseeded per call)
+    seed = zlib.crc32(temple.encode()) ^ dates[0].toordinal()
+    return np.random.default_rng(seed).normal(28, 5, len(dates)).clip(15, 40)
+
+
+class ForecastEngine:
+    def __init__(self, registry, temple_data, window_days=FORECAST_WINDOW_DAYS, weather=simulated_weather, weather_ttl=600, predictor='forest', corrector=None, cache_dir=None):
+        self.registry = registry
+        self.predictor = predictor  # 'forest' walks the trees, 'lattice' indexes the precomputed grid
+        self.corrector = corrector  # Optional live-count correction applied on top of each slice
+        self.temple_data = temple_data
+        self.window_days = window_days
+        self.weather = weather
+        self.weather_ttl = weather_ttl  # Seconds between re-reading weather inputs
+        self.cache_dir = cache_dir      # Prebuilt tables live here, so a fresh replica needs no model to serve forecasts
+        self._table = None
+        self._by_temple = {}
+        self._key = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.last_build_seconds = 0.0
+        self.source = None
+
+    def _inputs(self, today):
+        dates = pd.date_range(start=today, periods=self.window_days, freq='D')
+        temps = {temple: self.weather(temple, dates) for temple in self.temple_data}
+        key = (pd.Timestamp(today), self.window_days, zlib.crc32(b''.join(t.tobytes() for t in temps.values())))
+        return dates, temps, key
+
+    def _build(self, dates, temps):
+        calendar = feature_frame(dates, np.nan)  # Shared calendar features, temperature filled per temple
+        frames = []
+        for temple, data in self.temple_data.items():
+            model, features, _ = self.registry.get(temple, data['base_footfall'])
+            df = calendar.assign(temperature=temps[temple])
+            if self.predictor == 'lattice':
+                df['predicted_footfall'] = self.registry.get_lattice(temple, data['base_footfall']).predict(df[features])
+            else:
+                df['predicted_footfall'] = model.predict(df[features])
+            df['temple'] = temple
+            frames.append(df)
+        return pd.concat(frames, ignore_index=True).set_index(['temple', 'date']).sort_index()
+
+    def _artifact(self, key):
+        # Keyed by the inputs and the content digest of every model artifact, so retraining invalidates it without loading
+        # models, and copying artifacts to a replica (mtimes or not) still finds it
+        sigs = tuple(self.registry.signature(t, d['base_footfall']) for t, d in self.temple_data.items())
+        if self.cache_dir is None or None in sigs:
+            return None
+        digest = zlib.crc32(repr((key, sorted(self.temple_data), sigs)).encode())
+        return os.path.join(self.cache_dir, f"forecast-{self.predictor}-{digest:08x}.pkl")
+
+    def _load(self, key):
+        path = self._artifact(key)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            return pd.read_pickle(path)
+        except Exception:
+            return None  # Corrupt/partial file - rebuild
+
+    def _save(self, table, key):
+        path = self._artifact(key)
+        if path is None:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            table.to_pickle(tmp)
+            os.replace(tmp, path)
+            for stale in glob.glob(os.path.join(self.cache_dir, f"forecast-{self.predictor}-*.pkl")):
+                if stale != path:
+                    os.remove(stale)
+        except OSError:
+            pass  # Read-only model dir: serve from memory
+
+    def refresh(self, today, force=False):
+        now = time.monotonic()
+        if not force and self._key is not None and self._key[0] == pd.Timestamp(today) and now - self._checked_at < self.weather_ttl:
+            return False
+        with self._lock:
+            dates, temps, key = self._inputs(today)
+            self._checked_at = now
+            if not force and key == self._key:
+                return False
+            start = time.perf_counter()
+            table = None if force else self._load(key)
+            self.source = 'disk' if table is not None else 'built'
+            if table is None:
+                table = self._build(dates, temps)
+                self._save(table, key)
+            self._by_temple = {temple: table.loc[temple].reset_index()[COLUMNS] for temple in self.temple_data}
+            self._table = table
+            self._key = key
+            self.builds += 1
+            self.last_build_seconds = time.perf_counter() - start
+            return True
+
+    def forecast(self, temple, days_ahead=7, today=None):
+        today = today or TODAY
+        if days_ahead > self.window_days:
+            self.window_days = days_ahead
+            self._key = None
+        self.refresh(today)
+        df = self._by_temple[temple].iloc[:days_ahead].copy()
+        return self.corrector.adjust(temple, df) if self.corrector is not None else df
+
+    def stats(self):
+        return {'builds': self.builds, 'last_build_seconds': round(self.last_build_seconds, 4),
+                'rows': 0 if self._table is None else len(self._table), 'window_days': self.window_days, 'predictor': self.predictor,
+                'source': self.source}
+
+
+if __name__ == '__main__':
+    from model_registry import MODEL_DIR, ModelRegistry
+    from temples import TEMPLE_DATA
+    parser = argparse.ArgumentParser(description='Prebuild the forecast table so app replicas start without loading models.')
+    parser.add_argument('--today', type=date.fromisoformat, default=TODAY, help='Must match the day the app forecasts from, or replicas rebuild')
+    parser.add_argument('--days', type=int, default=FORECAST_WINDOW_DAYS)
+    parser.add_argument('--predictor', default='forest', choices=['forest', 'lattice'])
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    args = parser.parse_args()
+    engine = ForecastEngine(ModelRegistry(args.model_dir), TEMPLE_DATA, args.days, predictor=args.predictor, cache_dir=args.model_dir)
+    engine.refresh(args.today, force=True)
+    print(f"built {engine.stats()['rows']} rows in {engine.last_build_seconds:.2f}s -> {engine._artifact(engine._key)}")
@@ -0,0 +1,90 @@
+# Prediction Lattice (#1) - the forest evaluated once over the discrete feature grid, served by indexing
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+TEMP_RANGE = (15.0, 40.0)  # Training temperatures are clipped to this range
+DEFAULT_RESOLUTION = 0.5   # Degrees C per temperature bin
+AXES = {
+    'is_festival': np.array([0, 1]),
+    'is_holiday': np.array([0, 1]),
+    'month': np.arange(1, 13),
+    'dayofweek': np.arange(7),
+    'hour': np.arange(24),
+}
+
+
+class PredictionLattice:
+    def __init__(self, grid, features, resolution=DEFAULT_RESOLUTION):
+        self.grid = grid  # float32, one axis per feature in `features` order
+        self.features = features
+        self.resolution = resolution
+
+    @classmethod
+    def build(cls, model, features, resolution=DEFAULT_RESOLUTION):
+        temps = np.arange(TEMP_RANGE[0], TEMP_RANGE[1] + resolution / 2, resolution)
+        axes = [temps if f == 'temperature' else AXES[f] for f in features]
+        mesh = np.meshgrid(*axes, indexing='ij')
+        X = np.column_stack([m.ravel() for m in mesh])
+        preds = model.predict(pd.DataFrame(X, columns=features))
+        return cls(preds.reshape(mesh[0].shape).astype(np.float32), features, resolution)
+
+    def _indices(self, X):
+        idx = []
+        for i, f in enumerate(self.features):
+            col = np.asarray(X[f] if hasattr(X, 'columns') else X[:, i], dtype=float)
+            if f == 'temperature':
+                col = np.rint((np.clip(col, *TEMP_RANGE) - TEMP_RANGE[0]) / self.resolution)
+            elif f == 'month':
+                col = col - 1
+            idx.append(col.astype(np.intp))
+        return tuple(idx)
+
+    def predict(self, X):
+        return self.grid[self._indices(X)].astype(float)
+
+    @property
+    def nbytes(self):
+        return self.grid.nbytes
+
+
+def lattice_report(model, features, df, lattice):
+    # Error of lattice vs full forest on the held-out split, plus per-row lookup latency and memory
+    from model_registry import held_out_split
+    _, X_test, _, y_test = held_out_split(df, features)
+    y = y_test.to_numpy()
+    start = time.perf_counter()
+    forest = model.predict(X_test)
+    forest_s = time.perf_counter() - start
+    start = time.perf_counter()
+    approx = lattice.predict(X_test)
+    lattice_s = time.perf_counter() - start
+    return {
+        'rows': len(y),
+        'forest_mae': float(np.mean(np.abs(forest - y))),
+        'lattice_mae': float(np.mean(np.abs(approx - y))),
+        'lattice_vs_forest_mae': float(np.mean(np.abs(approx - forest))),
+        'lattice_vs_forest_max': float(np.max(np.abs(approx - forest))),
+        'forest_us_per_row': forest_s / len(y) * 1e6,
+        'lattice_us_per_row': lattice_s / len(y) * 1e6,
+        'lattice_bytes': lattice.nbytes,
+        'resolution': lattice.resolution,
+    }
+
+
+if __name__ == '__main__':
+    from model_registry import ModelRegistry
+    from temples import TEMPLE_DATA
+    parser = argparse.ArgumentParser(description='Compare the prediction lattice to the full forest per temple.')
+    parser.add_argument('--resolution', type=float, default=DEFAULT_RESOLUTION)
+    args = parser.parse_args()
+    registry = ModelRegistry()
+    print(f"{'temple':<10} {'forest MAE':>11} {'lattice MAE':>12} {'vs forest':>10} {'forest us':>10} {'lattice us':>11} {'KiB':>7}")
+    for temple, data in TEMPLE_DATA.items():
+        lat = registry.get_lattice(temple, data['base_footfall'], args.resolution)
+        model, features, df = registry.get(temple, data['base_footfall'])
+        r = lattice_report(model, features, df, lat)
+        print(f"{temple:<10} {r['forest_mae']:>11.1f} {r['lattice_mae']:>12.1f} {r['lattice_vs_forest_mae']:>10.1f} "
+              f"{r['forest_us_per_row']:>10.2f} {r['lattice_us_per_row']:>11.3f} {r['lattice_bytes'] / 1024:>7.1f}")
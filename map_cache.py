@@ -0,0 +1,213 @@
+# Map Rendering Cache (#4, #5, #7) - maps are rendered to HTML once per (temple, feature, state) and reused
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from perf import SPANS
+
+MAX_ENTRIES = 64
+MAX_DISK_FILES = 512  # Rendered maps kept in cache_dir; least recently used files are deleted beyond this
+
+LITE_TEMPLATE = """<!DOCTYPE html><html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width,initial-scale=1">
+<link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.css"/>
+<script src="https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.js"></script>
+<style>html,body,#m{{height:100%;margin:0}}</style></head><body><div id="m"></div><script>
+var m=L.map('m').setView([{lat},{lng}],15);
+L.tileLayer('https://tile.openstreetmap.org/{{z}}/{{x}}/{{y}}.png',{{maxZoom:19,attribution:'&copy; OpenStreetMap'}}).addTo(m);
+{markers}.forEach(function(p){{L.circleMarker([p[0],p[1]],{{radius:8,color:p[3],fillOpacity:0.8}}).bindPopup(p[2]).addTo(m);}});
+</script></body></html>"""
+
+
+MARKER_COLORS = {'parking': 'green', 'medical': 'orange', 'gate': 'purple', 'drone_base': 'blue'}
+FEATURE_KINDS = {'parking': ('parking', 'gate'), 'medical': ('parking', 'medical'), 'drone': ('parking', 'medical')}
+
+
+def map_markers(temple, data, feature='parking', drone_dispatched=False, facilities=None):
+    # (lat, lng, popup, color) for every marker a feature map shows; facilities are catalog (lat, lng, name, kind) rows
+    if not facilities:  # Temple without catalogued facilities: approximate layout around the shrine
+        facilities = [(data['lat'] + 0.001, data['lng'] + 0.001, "Empty Parking", 'parking'),
+                      (data['lat'] - 0.001, data['lng'] - 0.001, "Empty Parking", 'parking'),
+                      (data['lat'] - 0.002, data['lng'] + 0.002, "Medical Center", 'medical'),
+                      (data['lat'] + 0.0015, data['lng'] - 0.0005, "Drone Base", 'drone_base')]
+    kinds = FEATURE_KINDS.get(feature, ('parking',))
+    markers = [(lat, lng, name, MARKER_COLORS[kind]) for lat, lng, name, kind in facilities if kind in kinds]
+    markers.append((data['lat'], data['lng'], f"{temple} Temple", 'red'))
+    if feature == 'drone' and drone_dispatched:
+        markers += [(lat, lng, f"Drone w/ Kit - {name}", 'blue') for lat, lng, name, kind in facilities if kind == 'drone_base'][:1]
+    return markers
+
+
+def build_folium_map(data, markers):
+    import folium  # Deferred: lite maps and cache hits never need it
+    m = folium.Map(location=[data['lat'], data['lng']], zoom_start=15)
+    for lat, lng, popup, color in markers:
+        folium.Marker([lat, lng], popup=popup, icon=folium.Icon(color=color)).add_to(m)
+    return m
+
+
+def render_full(data, markers):
+    # Same HTML folium_static would embed
+    import folium
+    return folium.Figure().add_child(build_folium_map(data, markers)).render()
+
+
+def render_lite(data, markers):
+    # Plain Leaflet with circle markers: no jQuery/Bootstrap/Font Awesome/awesome-markers for low-bandwidth phones
+    return LITE_TEMPLATE.format(lat=data['lat'], lng=data['lng'], markers=json.dumps(markers))
+
+
+class MapCache:
+    def __init__(self, max_entries=MAX_ENTRIES, cache_dir=None, max_files=MAX_DISK_FILES):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir  # Rendered HTML persisted here, so a fresh replica never has to import folium
+        self.max_files = max_files
+        self._entries = OrderedDict()  # key -> html, least recently used first
+        self._versions = {}            # temple -> hash of the facilities its cached maps were drawn from
+        self._drones = {}              # temple -> drone_dispatched its cached drone map was drawn with
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.render_seconds = {'full': [], 'lite': []}
+        self.payload_bytes = {'full': 0, 'lite': 0}
+
+    def get(self, temple, data, feature='parking', drone_dispatched=False, lite=False, facilities=None):
+        # drone_dispatched only changes the drone map, so other features share one entry. The facilities are part of
+        # the key; a temple whose catalogue or drone state changed has its older maps dropped
+        version = hash(tuple(facilities or ()))
+        key = (temple, feature, feature == 'drone' and drone_dispatched, lite, version)
+        if self._versions.get(temple, version) != version:
+            self.invalidate(temple)
+        self._versions[temple] = version
+        if feature == 'drone':
+            if self._drones.get(temple, drone_dispatched) != drone_dispatched:
+                self.invalidate(temple, 'drone')
+            self._drones[temple] = drone_dispatched
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return html
+        start = time.perf_counter()
+        kind = 'lite' if lite else 'full'
+        markers = map_markers(temple, data, feature, drone_dispatched, facilities)
+        html = self._read(kind, data, markers)
+        if html is None:
+            with SPANS.span(f"map/render_{kind}"):
+                html = render_lite(data, markers) if lite else render_full(data, markers)
+            self._write(kind, data, markers, html)
+        with self._lock:
+            self.misses += 1
+            self.render_seconds[kind] = (self.render_seconds[kind] + [time.perf_counter() - start])[-100:]
+            self.payload_bytes[kind] = len(html.encode())
+            self._entries[key] = html
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return html
+
+    def _path(self, kind, data, markers):
+        # Named after the rendered content, so changed marker data simply misses
+        digest = zlib.crc32(repr((kind, data['lat'], data['lng'], markers)).encode())
+        return os.path.join(self.cache_dir, f"map-{kind}-{digest:08x}.html")
+
+    def _read(self, kind, data, markers):
+        if self.cache_dir is None:
+            return None
+        path = self._path(kind, data, markers)
+        try:
+            with open(path, encoding='utf-8') as f:
+                html = f.read()
+            os.utime(path)  # mtime is the file's last use, for _prune
+        except OSError:
+            return None
+        self.disk_hits += 1
+        return html
+
+    def _write(self, kind, data, markers, html):
+        if self.cache_dir is None:
+            return
+        path = self._path(kind, data, markers)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(html)
+            os.replace(tmp, path)
+            self._prune()
+        except OSError:
+            pass  # Read-only disk: memory cache only
+
+    def _prune(self):
+        # Keep the max_files most recently used maps; the rest are re-rendered if ever needed again
+        paths = glob.glob(os.path.join(self.cache_dir, 'map-*.html'))
+        if self.max_files is None or len(paths) <= self.max_files:
+            return
+        aged = []
+        for path in paths:
+            try:
+                aged.append((os.path.getmtime(path), path))
+            except OSError:
+                pass  # Pruned by another replica meanwhile
+        for _, path in sorted(aged)[:len(aged) - self.max_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def invalidate(self, temple=None, feature=None):
+        # Drop cached maps whose marker data changed (one temple and/or feature, or all)
+        with self._lock:
+            for key in [k for k in self._entries if (temple is None or k[0] == temple) and (feature is None or k[1] == feature)]:
+                del self._entries[key]
+
+    def stats(self):
+        return {
+            'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses, 'disk_hits': self.disk_hits, 'evictions': self.evictions,
+            'avg_render_ms': {k: round(1000 * sum(v) / len(v), 2) for k, v in self.render_seconds.items() if v},
+            'last_payload_bytes': self.payload_bytes,
+        }
+
+
+if __name__ == '__main__':
+    from temples import CATALOG, TEMPLE_DATA
+    parser = argparse.ArgumentParser(description='Payload size and render time: uncached folium vs cached vs lite maps.')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--prebuild', metavar='DIR', help='Instead, render every map variant into DIR for app replicas')
+    args = parser.parse_args()
+    if args.prebuild:
+        cache = MapCache(cache_dir=args.prebuild, max_files=max(MAX_DISK_FILES, 12 * len(TEMPLE_DATA)))
+        for temple, data in TEMPLE_DATA.items():
+            for feature in ('parking', 'medical', 'drone'):
+                for drone in (False, True):
+                    for lite in (False, True):
+                        cache.get(temple, data, feature, drone, lite, CATALOG.markers(temple))
+        print(f"{cache.stats()['misses']} maps in {args.prebuild} ({cache.disk_hits} already there)")
+        raise SystemExit
+    cache = MapCache()
+    print(f"{'temple':<10} {'feature':<8} {'folium ms':>10} {'cached ms':>10} {'folium KB':>10} {'lite ms':>8} {'lite KB':>8}")
+    for temple, data in TEMPLE_DATA.items():
+        facilities = CATALOG.markers(temple)
+        for feature in ('parking', 'medical', 'drone'):
+            markers = map_markers(temple, data, feature, True, facilities)
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                full = render_full(data, markers)
+            uncached = (time.perf_counter() - start) / args.repeat
+            cache.get(temple, data, feature, True, facilities=facilities)
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                cache.get(temple, data, feature, True, facilities=facilities)
+            cached = (time.perf_counter() - start) / args.repeat
+            start = time.perf_counter()
+            lite = render_lite(data, markers)
+            lite_s = time.perf_counter() - start
+            print(f"{temple:<10} {feature:<8} {uncached * 1000:>10.2f} {cached * 1000:>10.4f} {len(full.encode()) / 1024:>10.1f} "
+                  f"{lite_s * 1000:>8.3f} {len(lite.encode()) / 1024:>8.1f}")
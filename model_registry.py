@@ -0,0 +1,167 @@
+# Forecast Model Registry (#1) - train once per temple, persist, share across sessions
+import glob
+import hashlib
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+from features import FEATURES, HOURLY_FEATURES, synthesize_history
+from lattice import DEFAULT_RESOLUTION, PredictionLattice
+from perf import SPANS
+
+MODEL_DIR = os.environ.get('YATRA_MODEL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models'))
+ARTIFACT_VERSION = 2
+
+
+def held_out_split(df, features):
+    # Same split the forest is trained on; the test part is what accuracy reports score against
+    from sklearn.model_selection import train_test_split  # sklearn/joblib are imported on first use, not at app start
+    return train_test_split(df[features], df['footfall'], test_size=0.2, random_state=42)
+
+
+def train_model(base_footfall, freq='D', n_estimators=100, max_depth=None, n_jobs=None):
+    from sklearn.ensemble import RandomForestRegressor
+    df = synthesize_history(base_footfall, freq=freq)
+    features = FEATURES if freq == 'D' else HOURLY_FEATURES
+    X_train, X_test, y_train, y_test = held_out_split(df, features)
+    model = RandomForestRegressor(n_estimators=n_estimators, max_depth=max_depth, n_jobs=n_jobs, random_state=42)
+    model.fit(X_train, y_train)
+    return model, features, df
+
+
+def artifact_path(temple, base_footfall, model_dir=MODEL_DIR, freq='D'):
+    # Daily models keep the plain name the app serves; other frequencies get their own file
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', temple).strip('_').lower()
+    suffix = '' if freq == 'D' else f"-{freq}"
+    return os.path.join(model_dir, f"{slug}-{int(base_footfall)}{suffix}-v{ARTIFACT_VERSION}.joblib")
+
+
+def file_digest(path):
+    # Content hash of an artifact; unlike stat(), it survives copies that do not keep mtimes
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_artifact(path, model, features, df, base_footfall, freq='D'):
+    import joblib
+    if (list(features) == list(FEATURES)) != (freq == 'D'):
+        raise ValueError(f"features {list(features)} do not belong to a freq={freq!r} model; refusing to save it as {os.path.basename(path)}")
+    entry = {'model': model, 'features': features, 'df': df, 'base_footfall': base_footfall, 'freq': freq}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(entry, tmp)  # Uncompressed so the history frame can be memory-mapped on load
+    os.replace(tmp, path)  # Atomic swap - sessions mid-load keep the old file
+    with open(tmp, 'w') as f:
+        f.write(file_digest(path))
+    os.replace(tmp, path.replace('.joblib', '.sha256'))  # Stored next to it so readers need not hash the model
+    for stale in glob.glob(path.replace('.joblib', '-lattice*.npy')):
+        os.remove(stale)  # Lattices are compiled from the old forest
+    return os.path.getsize(path)
+
+
+class ModelRegistry:
+    # One process-wide instance, so every session shares one loaded forest per temple. Loading with mmap_mode='r'
+    # maps only the history frame; sklearn copies the tree arrays into private memory when it unpickles them.
+    def __init__(self, model_dir=MODEL_DIR):
+        self.model_dir = model_dir
+        self._models = {}  # (temple, freq) -> entry; the forecast engine only ever asks for the daily model
+        self._locks = {}
+        self._guard = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.load_times = {}  # temple -> (source, seconds)
+        self._lattices = {}
+
+    def _lock_for(self, temple):
+        with self._guard:
+            return self._locks.setdefault(temple, threading.Lock())
+
+    def get(self, temple, base_footfall, freq='D'):
+        key = (temple, freq)
+        entry = self._models.get(key)
+        if entry is not None and entry['base_footfall'] == base_footfall:
+            self.hits += 1
+            return entry['model'], entry['features'], entry['df']
+        with self._lock_for(temple):
+            entry = self._models.get(key)  # Another session may have loaded it meanwhile
+            if entry is None or entry['base_footfall'] != base_footfall:
+                self.misses += 1
+                entry = self._load_or_train(temple, base_footfall, freq)
+                self._models[key] = entry
+            else:
+                self.hits += 1
+        return entry['model'], entry['features'], entry['df']
+
+    def signature(self, temple, base_footfall):
+        # Content digest of the stored artifact without loading it; None if it has not been trained yet
+        path = artifact_path(temple, base_footfall, self.model_dir)
+        try:
+            with open(path.replace('.joblib', '.sha256')) as f:
+                return f.read().strip()
+        except OSError:
+            pass
+        try:
+            return file_digest(path)  # Artifact saved before digests were stored alongside
+        except OSError:
+            return None
+
+    def _load_or_train(self, temple, base_footfall, freq='D'):
+        import joblib
+        path = artifact_path(temple, base_footfall, self.model_dir, freq)
+        label = temple if freq == 'D' else f"{temple} ({freq})"
+        start = time.perf_counter()
+        if os.path.exists(path):
+            try:
+                with SPANS.span('model/load'):
+                    entry = joblib.load(path, mmap_mode='r')
+                # Judged by features, so an hourly forest saved under the daily name by older code is never served
+                stored = 'D' if list(entry['features']) == list(FEATURES) else entry.get('freq', 'h')
+                if stored == freq:
+                    self.load_times[label] = ('disk', time.perf_counter() - start)
+                    return entry
+            except Exception:
+                pass  # Corrupt/stale artifact, or one trained at another frequency - retrain below
+        with SPANS.span('model/train'):
+            save_artifact(path, *train_model(base_footfall, freq), base_footfall, freq)
+        entry = joblib.load(path, mmap_mode='r')
+        self.load_times[label] = ('trained', time.perf_counter() - start)
+        return entry
+
+    def get_lattice(self, temple, base_footfall, resolution=DEFAULT_RESOLUTION):
+        key = (temple, base_footfall, resolution)
+        lat = self._lattices.get(key)
+        if lat is not None:
+            return lat
+        model, features, _ = self.get(temple, base_footfall)
+        with self._lock_for(temple):
+            lat = self._lattices.get(key)
+            if lat is None:
+                path = artifact_path(temple, base_footfall, self.model_dir).replace('.joblib', f"-lattice{resolution:g}.npy")
+                start = time.perf_counter()
+                if os.path.exists(path):
+                    lat, source = PredictionLattice(np.load(path, mmap_mode='r'), features, resolution), 'disk'
+                else:
+                    lat, source = PredictionLattice.build(model, features, resolution), 'built'
+                    np.save(path, lat.grid)
+                self.load_times[f"{temple} (lattice)"] = (source, time.perf_counter() - start)
+                self._lattices[key] = lat
+        return lat
+
+    def warm(self, temple_data):
+        for temple, data in temple_data.items():
+            self.get(temple, data['base_footfall'])
+        return self
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'loaded': sorted(t if f == 'D' else f"{t} ({f})" for t, f in self._models),
+            'load_times': {k: {'source': src, 'seconds': round(sec, 4)} for k, (src, sec) in self.load_times.items()},
+        }
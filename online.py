@@ -0,0 +1,105 @@
+# Online Forecast Correction (#1) - live gate counts rescale the stored forecast intra-day, no retraining
+import csv
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from features import hourly_profile
+from model_registry import MODEL_DIR
+
+PRIOR_SHARE = 0.05   # Pseudo-count, as a share of the day's forecast, pulling early-morning ratios towards 1
+HORIZON_DECAY = 0.5  # Correction carried into day h ahead is scaled by HORIZON_DECAY ** h
+CUMULATIVE = np.concatenate([[0.0], np.cumsum(hourly_profile(np.arange(24)))])
+
+
+def expected_share(ts):
+    # Fraction of a day's footfall expected by time-of-day ts (linear within the hour)
+    hour = ts.hour + ts.minute / 60 + ts.second / 3600
+    return float(np.interp(hour, np.arange(25), CUMULATIVE))
+
+
+class ResidualCorrector:
+    def __init__(self, history_dir=os.path.join(MODEL_DIR, 'observed')):
+        self.history_dir = history_dir
+        self._days = {}  # (temple, day) -> [cumulative count, last observation time]
+        self._lock = threading.Lock()
+        self._replay()
+
+    def _replay(self):
+        # Rebuild per-day totals from the stored readings after a restart
+        if not os.path.isdir(self.history_dir):
+            return
+        for name in os.listdir(self.history_dir):
+            if not name.endswith('.csv'):
+                continue
+            with open(os.path.join(self.history_dir, name), newline='') as f:
+                header = f.readline().strip()
+                temple = header[2:] if header.startswith('# ') else None
+                for ts, count in csv.reader(f):
+                    if float(count) < 0:
+                        continue  # Written before observe() rejected negative counts
+                    ts = pd.Timestamp(ts)
+                    day = self._days.setdefault((temple, ts.normalize()), [0.0, ts])
+                    day[0] += float(count)
+                    day[1] = max(day[1], ts)
+
+    def _history_path(self, temple):
+        return os.path.join(self.history_dir, re.sub(r'[^A-Za-z0-9]+', '_', temple).strip('_').lower() + '.csv')
+
+    def observe(self, temple, ts, count):
+        # count = pilgrims through the gates since the previous reading for this temple; readings must move forward in time
+        if count < 0:
+            raise ValueError(f"gate count must not be negative, got {count}")
+        ts = pd.Timestamp(ts)
+        key = (temple, ts.normalize())
+        with self._lock:
+            if key in self._days and ts < self._days[key][1]:
+                raise ValueError(f"reading at {ts} is earlier than the last one for {temple} ({self._days[key][1]})")
+            day = self._days.setdefault(key, [0.0, ts])
+            day[0] += count
+            day[1] = max(day[1], ts)
+            path = self._history_path(temple)
+            os.makedirs(self.history_dir, exist_ok=True)
+            new = not os.path.exists(path)
+            with open(path, 'a', newline='') as f:
+                if new:
+                    f.write(f"# {temple}\n")  # Temple name header so replay can map the file back
+                csv.writer(f).writerow([ts.isoformat(), count])
+
+    def history(self, temple):
+        # Daily totals of every stored reading, e.g. to fold real counts into the next nightly retrain
+        path = self._history_path(temple)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=['date', 'footfall'])
+        obs = pd.read_csv(path, names=['time', 'count'], parse_dates=['time'], comment='#')
+        obs = obs[obs['count'] >= 0]
+        return obs.groupby(obs['time'].dt.normalize())['count'].sum().rename_axis('date').rename('footfall').reset_index()
+
+    def last_reading(self, temple, day):
+        entry = self._days.get((temple, pd.Timestamp(day).normalize()))
+        return None if entry is None else entry[1]
+
+    def ratio(self, temple, day, forecast):
+        entry = self._days.get((temple, pd.Timestamp(day).normalize()))
+        if entry is None or forecast <= 0:
+            return 1.0
+        observed, last = entry
+        prior = PRIOR_SHARE * forecast
+        return (observed + prior) / (forecast * expected_share(last) + prior)
+
+    def adjust(self, temple, df):
+        # df is a forecast slice starting at today; scales predicted_footfall, keeps the model output in base_forecast
+        if df.empty:
+            return df
+        ratio = self.ratio(temple, df['date'].iloc[0], df['predicted_footfall'].iloc[0])
+        df['base_forecast'] = df['predicted_footfall']
+        if ratio != 1.0:
+            df['predicted_footfall'] = df['base_forecast'] * (1 + (ratio - 1) * HORIZON_DECAY ** np.arange(len(df)))
+        return df
+
+    def stats(self, temple):
+        return {str(day.date()): {'observed': obs, 'last_reading': str(last)}
+                for (t, day), (obs, last) in self._days.items() if t == temple}
@@ -0,0 +1,209 @@
+# Performance Spans - always-on timing of hot paths, aggregated into fixed-bucket histograms
+import argparse
+import bisect
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Histogram upper bounds in seconds (Prometheus "le" buckets)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC = 'yatra_span_seconds'
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum', 'count', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation (max for the +Inf bucket)
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+
+class Spans:
+    def __init__(self):
+        self._hists = {}
+        self._lock = threading.Lock()
+        self._exporter = None
+
+    def observe(self, name, seconds):
+        i = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            h = self._hists.get(name)
+            if h is None:
+                h = self._hists[name] = Histogram()
+            h.counts[i] += 1
+            h.sum += seconds
+            h.count += 1
+            if seconds > h.max:
+                h.max = seconds
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name=None):
+        def decorate(fn):
+            label = name or fn.__name__
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(label, time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def summary(self):
+        # One row per span, slowest total first; times in ms (quantiles are bucket upper bounds)
+        with self._lock:
+            items = [(name, h.count, h.sum, h.max, h.quantile(0.5), h.quantile(0.95), h.quantile(0.99))
+                     for name, h in self._hists.items()]
+        rows = [{'span': name, 'count': n, 'total_s': round(total, 3), 'mean_ms': round(1000 * total / n, 3),
+                 'p50_ms': round(1000 * p50, 3), 'p95_ms': round(1000 * p95, 3), 'p99_ms': round(1000 * p99, 3),
+                 'max_ms': round(1000 * mx, 3)}
+                for name, n, total, mx, p50, p95, p99 in items if n]
+        return sorted(rows, key=lambda r: -r['total_s'])
+
+    def buckets(self, name):
+        # {'<=0.5ms': n, ...} non-cumulative, for charting one span
+        with self._lock:
+            h = self._hists.get(name)
+            counts = list(h.counts) if h else [0] * (len(BUCKETS) + 1)
+        labels = [f"<={b * 1000:g}ms" for b in BUCKETS] + [f">{BUCKETS[-1] * 1000:g}ms"]
+        return dict(zip(labels, counts))
+
+    def to_prometheus(self):
+        lines = [f"# HELP {METRIC} Wall time of instrumented app spans", f"# TYPE {METRIC} histogram"]
+        with self._lock:
+            items = sorted((name, list(h.counts), h.sum, h.count) for name, h in self._hists.items())
+        for name, counts, total, n in items:
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            cumulative = 0
+            for bound, c in zip(BUCKETS, counts):
+                cumulative += c
+                lines.append(f'{METRIC}_bucket{{span="{label}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'{METRIC}_bucket{{span="{label}",le="+Inf"}} {n}')
+            lines.append(f'{METRIC}_sum{{span="{label}"}} {total:.6f}')
+            lines.append(f'{METRIC}_count{{span="{label}"}} {n}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        # Atomic replace, safe for a node_exporter textfile collector to read at any time
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+    def export_every(self, path, seconds=15):
+        # Background file export; only the first call starts a thread
+        if self._exporter is None:
+            def loop():
+                while True:
+                    time.sleep(seconds)
+                    try:
+                        self.write_prometheus(path)
+                    except OSError:
+                        pass
+            self._exporter = threading.Thread(target=loop, daemon=True, name='span-exporter')
+            self._exporter.start()
+        return self._exporter
+
+    def reset(self):
+        with self._lock:
+            self._hists.clear()
+
+
+SPANS = Spans()  # Process-wide, like the app's cache_resource singletons
+HEAVY_MODULES = ('sklearn', 'joblib', 'matplotlib', 'folium')
+
+
+def process_uptime():
+    # Seconds since this process started (Linux /proc); None elsewhere
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            return float(f.read().split()[0]) - start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupTimer:
+    # Phase durations of the first script run in this process; reruns after finish() are ignored
+    def __init__(self):
+        self.phases = {}
+        self.done = False
+        self._last = None
+        self.process_to_first_render = None
+        self.heavy_loaded = []
+
+    def mark(self, phase, start=None):
+        if self.done:
+            return
+        now = time.perf_counter()
+        start = start if start is not None else self._last
+        if start is not None:
+            self.phases[phase] = now - start
+            SPANS.observe(f"startup/{phase}", now - start)
+        self._last = now
+
+    def finish(self):
+        if self.done:
+            return
+        self.done = True
+        self.process_to_first_render = process_uptime()
+        self.heavy_loaded = [m for m in HEAVY_MODULES if m in sys.modules]
+
+    def stats(self):
+        return {'phases_s': {k: round(v, 4) for k, v in self.phases.items()},
+                'first_render_s': round(sum(self.phases.values()), 4),
+                'process_to_first_render_s': None if self.process_to_first_render is None else round(self.process_to_first_render, 3),
+                'heavy_modules_loaded': self.heavy_loaded}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Per-span overhead of the instrumentation.')
+    parser.add_argument('--n', type=int, default=1000000)
+    args = parser.parse_args()
+    spans = Spans()
+    start = time.perf_counter()
+    for _ in range(args.n):
+        pass
+    empty = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(args.n):
+        with spans.span('bench'):
+            pass
+    ctx = time.perf_counter() - start
+
+    @spans.timed('decorated')
+    def f():
+        pass
+    start = time.perf_counter()
+    for _ in range(args.n):
+        f()
+    dec = time.perf_counter() - start
+    print(f"context-manager span {1e6 * (ctx - empty) / args.n:.2f} us, decorator span {1e6 * (dec - empty) / args.n:.2f} us per call")
+    print(spans.to_prometheus().splitlines()[2])
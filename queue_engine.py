@@ -0,0 +1,193 @@
+# Queue Engine (#2) - process-wide darshan queues shared by every session
+import argparse
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+PRIORITY_RANK = {True: 0, False: 1}  # Elderly/disabled passes are called before general ones
+FINISHED_HISTORY = 10000  # Served/cancelled tickets kept per temple for status lookups
+
+
+class TempleQueue:
+    # One lock per temple, so joins at Somnath never wait on Dwarka
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.heap = []      # (rank, seq, ticket_id); cancelled entries are skipped lazily
+        self.tickets = {}   # ticket_id -> ticket dict
+        self.by_user = {}   # user_id -> [ticket_id, ...]
+        self.finished = deque()
+        self.waiting = 0
+
+    def _compact(self):
+        if len(self.heap) > 64 and len(self.heap) > 2 * self.waiting:
+            self.heap = [e for e in self.heap if self.tickets.get(e[2], {}).get('status') == 'Waiting']
+            heapq.heapify(self.heap)
+
+    def _finish(self, ticket, status):
+        ticket['status'] = status
+        self.waiting -= 1
+        self.finished.append(ticket['ticket_id'])
+        while len(self.finished) > FINISHED_HISTORY:
+            old = self.tickets.pop(self.finished.popleft(), None)
+            if old is not None:
+                ids = self.by_user.get(old['user_id'], [])
+                if old['ticket_id'] in ids:
+                    ids.remove(old['ticket_id'])
+                if not ids:
+                    self.by_user.pop(old['user_id'], None)
+
+
+class QueueEngine:
+    def __init__(self):
+        self._queues = {}
+        self._guard = threading.Lock()
+        self._ticket_ids = itertools.count(1)
+        self._user_ids = itertools.count(1)
+        self._seq = itertools.count()
+        self._ticket_temple = {}  # ticket_id -> temple, for cancel/lookup by id alone
+        self._listeners = []      # fn(event, ticket) run under the temple lock, so they see events in order
+
+    def _queue(self, temple):
+        q = self._queues.get(temple)
+        if q is None:
+            with self._guard:
+                q = self._queues.setdefault(temple, TempleQueue())
+        return q
+
+    def subscribe(self, listener):
+        # Listeners must be cheap: they run inside the temple lock on every join/serve/cancel
+        self._listeners.append(listener)
+        return listener
+
+    def _emit(self, event, ticket):
+        for listener in self._listeners:
+            listener(event, ticket)
+
+    def restore(self, tickets):
+        # Rebuild queues from persisted tickets (event log replay) without emitting events; ids continue after the highest seen
+        max_ticket, max_user = 0, 0
+        for ticket in sorted(tickets, key=lambda t: t['ticket_id']):
+            ticket = dict(ticket)
+            q = self._queue(ticket['temple'])
+            with q.lock:
+                q.tickets[ticket['ticket_id']] = ticket
+                q.by_user.setdefault(ticket['user_id'], []).append(ticket['ticket_id'])
+                if ticket['status'] == 'Waiting':
+                    heapq.heappush(q.heap, (PRIORITY_RANK[bool(ticket['priority'])], next(self._seq), ticket['ticket_id']))
+                    q.waiting += 1
+                    self._ticket_temple[ticket['ticket_id']] = ticket['temple']
+                else:
+                    q.finished.append(ticket['ticket_id'])
+            max_ticket = max(max_ticket, ticket['ticket_id'])
+            if isinstance(ticket['user_id'], int):
+                max_user = max(max_user, ticket['user_id'])
+        self._ticket_ids = itertools.count(max_ticket + 1)
+        self._user_ids = itertools.count(max_user + 1)
+        return max_ticket
+
+    def next_user_id(self):
+        return next(self._user_ids)
+
+    def join(self, temple, entry):
+        # O(log n): push onto the temple heap and index by user
+        ticket = dict(entry, temple=temple, ticket_id=next(self._ticket_ids), status='Waiting')
+        q = self._queue(temple)
+        with q.lock:
+            heapq.heappush(q.heap, (PRIORITY_RANK[bool(ticket['priority'])], next(self._seq), ticket['ticket_id']))
+            q.tickets[ticket['ticket_id']] = ticket
+            q.by_user.setdefault(ticket['user_id'], []).append(ticket['ticket_id'])
+            q.waiting += 1
+            self._ticket_temple[ticket['ticket_id']] = temple  # Before the lock drops, so a racing cancel/lookup finds it
+            self._emit('join', ticket)
+        return ticket
+
+    def advance(self, temple, n=1):
+        # Call the next n pilgrims (priority first, then by join order); O(log n) each
+        q = self._queue(temple)
+        served = []
+        with q.lock:
+            while q.heap and len(served) < n:
+                _, _, ticket_id = heapq.heappop(q.heap)
+                ticket = q.tickets.get(ticket_id)
+                if ticket is not None and ticket['status'] == 'Waiting':
+                    q._finish(ticket, 'Served')
+                    self._ticket_temple.pop(ticket_id, None)
+                    self._emit('served', ticket)
+                    served.append(ticket)
+        return served
+
+    def cancel(self, ticket_id):
+        temple = self._ticket_temple.pop(ticket_id, None)
+        if temple is None:
+            return False
+        q = self._queue(temple)
+        with q.lock:
+            ticket = q.tickets.get(ticket_id)
+            if ticket is None or ticket['status'] != 'Waiting':
+                return False
+            q._finish(ticket, 'Cancelled')
+            self._emit('cancelled', ticket)
+            q._compact()
+        return True
+
+    def ticket(self, ticket_id, temple=None):
+        temple = temple or self._ticket_temple.get(ticket_id)
+        if temple is None:
+            for q in list(self._queues.values()):  # Finished tickets are only indexed per temple
+                if ticket_id in q.tickets:
+                    return q.tickets[ticket_id]
+            return None
+        return self._queue(temple).tickets.get(ticket_id)
+
+    def tickets_for_user(self, temple, user_id):
+        q = self._queue(temple)
+        with q.lock:
+            return [q.tickets[i] for i in q.by_user.get(user_id, ()) if i in q.tickets]
+
+    def waiting_count(self, temple):
+        return self._queue(temple).waiting
+
+    def waiting_tickets(self, temple):
+        q = self._queue(temple)
+        with q.lock:
+            return [t for t in q.tickets.values() if t['status'] == 'Waiting']
+
+    def head(self, temple, limit=100):
+        # Next `limit` waiting tickets in call order - O(n log k), for dashboards only
+        q = self._queue(temple)
+        with q.lock:
+            entries = heapq.nsmallest(limit + len(q.heap) - q.waiting, q.heap)
+            return [q.tickets[e[2]] for e in entries if q.tickets.get(e[2], {}).get('status') == 'Waiting'][:limit]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Concurrent join/advance/cancel throughput of the queue engine.')
+    parser.add_argument('--tickets', type=int, default=100000, help='Tickets per temple')
+    parser.add_argument('--temples', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+    engine = QueueEngine()
+    temples = [f"Temple{i}" for i in range(args.temples)]
+
+    def worker(k):
+        temple = temples[k % len(temples)]
+        share = args.tickets * len(temples) // args.threads
+        for i in range(share):
+            t = engine.join(temple, {'user_id': engine.next_user_id(), 'priority': i % 5 == 0})
+            if i % 10 == 0:
+                engine.cancel(t['ticket_id'])
+            if i % 3 == 0:
+                engine.advance(temple)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(args.threads)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    elapsed = time.perf_counter() - start
+    ops = args.tickets * len(temples) * (1 + 0.1 + 1 / 3)
+    print(f"{ops:,.0f} ops across {args.threads} threads in {elapsed:.2f}s ({ops / elapsed:,.0f} ops/s); "
+          f"waiting per temple: {[engine.waiting_count(t) for t in temples]}")
@@ -0,0 +1,126 @@
+# Queue Metrics (#2, #6) - running per-temple aggregates fed by queue engine events, O(1) to read
+import argparse
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+
+WAIT_BUCKET_MINUTES = 15
+WAIT_BUCKETS = 17          # 0-15, 15-30, ... 240+ minutes
+HOURS = 24
+
+
+class TempleMetrics:
+    def __init__(self):
+        self.waiting = 0
+        self.wait_sum = 0.0     # Sum of est_wait over waiting tickets
+        self.priority = 0       # Waiting tickets holding priority passes
+        self.slot_types = Counter()
+        self.wait_hist = np.zeros(WAIT_BUCKETS, dtype=np.int64)     # Waiting tickets by est_wait bucket
+        self.by_hour = np.zeros((3, HOURS), dtype=np.int64)        # Joins / served / cancelled by hour of day
+        self.served = 0
+        self.cancelled = 0
+        self.served_wait_sum = 0.0  # Actual minutes served pilgrims spent queued
+
+    def _waiting_delta(self, ticket, sign):
+        self.waiting += sign
+        self.wait_sum += sign * ticket.get('est_wait', 0)
+        self.priority += sign * bool(ticket.get('priority'))
+        self.slot_types[ticket.get('slot_type', 'Free')] += sign
+        self.wait_hist[min(int(ticket.get('est_wait', 0)) // WAIT_BUCKET_MINUTES, WAIT_BUCKETS - 1)] += sign
+
+    def snapshot(self):
+        return {
+            'waiting': self.waiting,
+            'avg_wait': self.wait_sum / self.waiting if self.waiting else None,
+            'priority_share': self.priority / self.waiting if self.waiting else 0.0,
+            'slot_types': {k: v for k, v in self.slot_types.items() if v},
+            'served': self.served,
+            'cancelled': self.cancelled,
+            'avg_served_wait': self.served_wait_sum / self.served if self.served else None,
+        }
+
+
+class QueueMetrics:
+    # Subscribe with engine.subscribe(metrics.on_event); per-temple updates are serialised by the engine's temple lock
+    EVENTS = {'join': 0, 'served': 1, 'cancelled': 2}
+
+    def __init__(self, clock=datetime.now):
+        self.clock = clock
+        self._temples = {}
+        self._guard = threading.Lock()
+
+    def temple(self, temple):
+        m = self._temples.get(temple)
+        if m is None:
+            with self._guard:
+                m = self._temples.setdefault(temple, TempleMetrics())
+        return m
+
+    def on_event(self, event, ticket):
+        m = self.temple(ticket['temple'])
+        now = self.clock()
+        m.by_hour[self.EVENTS[event], now.hour] += 1
+        if event == 'join':
+            m._waiting_delta(ticket, 1)
+            return
+        m._waiting_delta(ticket, -1)
+        if event == 'served':
+            m.served += 1
+            if isinstance(ticket.get('join_time'), datetime):
+                m.served_wait_sum += max(0.0, (now - ticket['join_time']).total_seconds() / 60)
+        else:
+            m.cancelled += 1
+
+    def restore(self, tickets):
+        # Seed totals from tickets recovered at startup; hour-of-day counts only cover events from here on
+        for ticket in tickets:
+            m = self.temple(ticket['temple'])
+            if ticket['status'] == 'Waiting':
+                m._waiting_delta(ticket, 1)
+            elif ticket['status'] == 'Served':
+                m.served += 1
+            else:
+                m.cancelled += 1
+
+    def summary(self, temple):
+        return self.temple(temple).snapshot()
+
+    def wait_histogram(self, temple):
+        # {'0-15': n, ..., '240+': n} over waiting tickets
+        labels = [f"{i * WAIT_BUCKET_MINUTES}-{(i + 1) * WAIT_BUCKET_MINUTES}" for i in range(WAIT_BUCKETS - 1)]
+        labels.append(f"{(WAIT_BUCKETS - 1) * WAIT_BUCKET_MINUTES}+")
+        return dict(zip(labels, self.temple(temple).wait_hist.tolist()))
+
+    def hourly(self, temple):
+        # {'join'|'served'|'cancelled': [24 counts]} by hour of day
+        return {event: self.temple(temple).by_hour[i].tolist() for event, i in self.EVENTS.items()}
+
+
+if __name__ == '__main__':
+    import random
+    from queue_engine import QueueEngine
+    parser = argparse.ArgumentParser(description='Dashboard read cost: full waiting-ticket scan vs running aggregates.')
+    parser.add_argument('--tickets', type=int, default=200000)
+    args = parser.parse_args()
+    engine = QueueEngine()
+    metrics = QueueMetrics()
+    engine.subscribe(metrics.on_event)
+    start = time.perf_counter()
+    for i in range(args.tickets):
+        engine.join('Somnath', {'user_id': i, 'priority': i % 10 == 0, 'est_wait': random.randint(1, 300),
+                                'slot_type': random.choice(['Free', 'Paid']), 'join_time': datetime.now()})
+    engine.advance('Somnath', args.tickets // 4)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    tickets = engine.waiting_tickets('Somnath')
+    scan_mean = np.mean([t['est_wait'] for t in tickets])
+    scan = time.perf_counter() - start
+    start = time.perf_counter()
+    summary = metrics.summary('Somnath')
+    agg = time.perf_counter() - start
+    assert abs(summary['avg_wait'] - scan_mean) < 1e-6 and summary['waiting'] == len(tickets)
+    print(f"{args.tickets:,} joins + {args.tickets // 4:,} served in {build:.2f}s; "
+          f"scan {scan * 1000:.1f} ms vs aggregates {agg * 1e6:.1f} us; {summary}")
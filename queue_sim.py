@@ -0,0 +1,138 @@
+# Darshan Queue Simulator (#2) - minute-step discrete-event simulation of a day's queue, priority served first
+import argparse
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from features import SESSION_STARTS, SESSION_WEIGHTS, hourly_profile
+
+OPEN_MINUTE = 60 * SESSION_STARTS[np.flatnonzero(SESSION_WEIGHTS)[0]]          # 5AM
+CLOSE_MINUTE = 60 * SESSION_STARTS[np.flatnonzero(SESSION_WEIGHTS)[-1] + 1]    # 9PM
+SLOT_MINUTES = 30
+DARSHAN_HALLS = 4
+DESIGN_UTILIZATION = 0.6   # Halls sized so an ordinary (base footfall) day runs ~60% busy, leaving aarti-peak headroom
+PRIORITY_SHARE = 0.1       # Share of arrivals holding elderly/disabled priority passes
+
+
+def hall_capacity(base_footfall, halls=DARSHAN_HALLS):
+    # Pilgrims per minute one hall can admit, sized from the temple's ordinary day
+    return base_footfall / (CLOSE_MINUTE - OPEN_MINUTE) / halls / DESIGN_UTILIZATION
+
+
+def simulate_day(daily_arrivals, capacity_per_minute, priority_share=PRIORITY_SHARE, seed=0):
+    # Returns one row per arrival: arrival minute-of-day, class and wait in minutes
+    rng = np.random.default_rng(seed)
+    minutes = np.arange(OPEN_MINUTE, CLOSE_MINUTE)
+    rate = daily_arrivals * hourly_profile(minutes // 60) / 60
+    arrivals = rng.poisson(rate)
+    prio = rng.binomial(arrivals, priority_share)
+    general = arrivals - prio
+
+    # Capacity goes to the priority line first, leftovers to general; backlogs carry over each minute
+    served_p = np.empty_like(prio)
+    served_g = np.empty_like(general)
+    cap = capacity_per_minute
+    q_p = q_g = 0.0
+    carry = 0.0
+    for i in range(len(minutes)):
+        carry += cap
+        slots = int(carry)
+        carry -= slots
+        q_p += prio[i]
+        q_g += general[i]
+        sp = min(q_p, slots)
+        sg = min(q_g, slots - sp)
+        q_p -= sp
+        q_g -= sg
+        served_p[i] = sp
+        served_g[i] = sg
+
+    frames = []
+    for cls, arr, srv in (('priority', prio, served_p), ('general', general, served_g)):
+        total = int(arr.sum())
+        if total == 0:
+            continue
+        k = np.arange(total)
+        cum_arr = np.cumsum(arr)
+        cum_srv = np.cumsum(srv)
+        arr_idx = np.searchsorted(cum_arr, k, side='right')
+        dep_idx = np.searchsorted(cum_srv, k, side='right').astype(float)
+        # Still queued at closing: admitted after hours at full capacity
+        late = dep_idx >= len(minutes)
+        dep_idx[late] = len(minutes) + (k[late] - cum_srv[-1]) / max(cap, 1e-9)
+        frames.append(pd.DataFrame({'minute': minutes[arr_idx], 'cls': cls,
+                                    'wait': dep_idx - arr_idx + rng.random(total)}))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['minute', 'cls', 'wait'])
+
+
+def wait_table(waits, slot_minutes=SLOT_MINUTES):
+    # Per-slot, per-class wait distribution
+    slot = waits['minute'] // slot_minutes * slot_minutes
+    grouped = waits.groupby([slot.rename('slot'), 'cls'])['wait']
+    return pd.DataFrame({
+        'arrivals': grouped.size(),
+        'mean': grouped.mean(),
+        'p50': grouped.median(),
+        'p90': grouped.quantile(0.9),
+    })
+
+
+class WaitEstimator:
+    # Simulation per temple, cached until the forecast/capacity changes or `ttl` seconds pass
+    def __init__(self, temple_data, halls=DARSHAN_HALLS, priority_share=PRIORITY_SHARE, ttl=300):
+        self.temple_data = temple_data
+        self.halls = halls
+        self.priority_share = priority_share
+        self.ttl = ttl
+        self._tables = {}
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.last_run_seconds = 0.0
+
+    def capacity(self, temple):
+        data = self.temple_data[temple]
+        halls = data.get('darshan_halls', self.halls)
+        return halls * data.get('hall_capacity', hall_capacity(data['base_footfall']))
+
+    def table(self, temple, daily_forecast):
+        key = (round(float(daily_forecast), -2), self.capacity(temple))
+        cached = self._tables.get(temple)
+        if cached is not None and cached[0] == key and time.monotonic() - cached[1] < self.ttl:
+            return cached[2]
+        with self._lock:
+            start = time.perf_counter()
+            waits = simulate_day(daily_forecast, key[1], self.priority_share, seed=self.runs)
+            table = wait_table(waits)
+            self._tables[temple] = (key, time.monotonic(), table)
+            self.runs += 1
+            self.last_run_seconds = time.perf_counter() - start
+        return table
+
+    def estimate(self, temple, daily_forecast, when, priority=False, stat='p50'):
+        table = self.table(temple, daily_forecast)
+        minute = min(max(when.hour * 60 + when.minute, OPEN_MINUTE), CLOSE_MINUTE - 1)
+        slot = minute // SLOT_MINUTES * SLOT_MINUTES
+        cls = 'priority' if priority else 'general'
+        if (slot, cls) in table.index:
+            return float(table.loc[(slot, cls), stat])
+        return 0.0  # No simulated arrivals of this class in the slot - walk straight in
+
+    def stats(self):
+        return {'runs': self.runs, 'last_run_seconds': round(self.last_run_seconds, 4)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time a simulated darshan day and print its wait table.')
+    parser.add_argument('--arrivals', type=int, default=50000, help='Daily arrivals (forecast footfall)')
+    parser.add_argument('--base', type=int, default=25000, help='Ordinary-day footfall the halls are sized for')
+    parser.add_argument('--halls', type=int, default=DARSHAN_HALLS)
+    args = parser.parse_args()
+    cap = args.halls * hall_capacity(args.base)
+    start = time.perf_counter()
+    waits = simulate_day(args.arrivals, cap)
+    table = wait_table(waits)
+    elapsed = time.perf_counter() - start
+    print(table.round(1).to_string())
+    print(f"{len(waits):,} arrivals simulated in {elapsed:.3f}s")
@@ -0,0 +1,266 @@
+# IoT Sensor Ingestion (#3) - asyncio socket feed into per-zone NumPy rings of time buckets with windowed density metrics
+import argparse
+import asyncio
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+HOST = '127.0.0.1'
+PORT = int(os.environ.get('YATRA_SENSOR_PORT', 8765))
+BUCKET_SECONDS = 0.5      # Readings are summed per zone per bucket, so memory and accuracy do not depend on sensor count
+WINDOW_SECONDS = 30.0
+EVALUATE_SECONDS = 1.0    # How often the server checks thresholds, whether or not anyone is watching
+PANIC_THRESHOLD = 0.8
+DENSITY_CRITICAL = 0.7    # Density where panic scoring starts
+DENSITY_FULL = 0.9        # Density scored as fully critical
+RATE_CRITICAL = 0.015     # Density rise per second that counts as a crush building
+DEFAULT_ZONES = ['Main Gate', 'Darshan Hall', 'Parking', 'Queue Complex', 'Exit']
+
+
+class SensorHub:
+    # Readings are "temple,zone,sensor_id,unix_time,density" lines; density is the occupied fraction 0..1.
+    # Each zone keeps a ring of BUCKET_SECONDS buckets (reading sum and count) covering the window
+    def __init__(self, window=WINDOW_SECONDS, bucket_seconds=BUCKET_SECONDS):
+        self.window = window
+        self.bucket_seconds = bucket_seconds
+        self.slots = int(np.ceil(window / bucket_seconds)) + 2
+        self.zones = {}        # (temple, zone) -> row in the ring arrays
+        self.zone_keys = []
+        self.sums = np.zeros((0, self.slots))
+        self.counts = np.zeros((0, self.slots), dtype=np.int64)
+        self.buckets = np.zeros((0, self.slots), dtype=np.int64)  # Bucket number each slot currently holds
+        self.readings = 0
+        self._listeners = []   # fn(temple, zone, panic_score, density, episode) for zones at or over PANIC_THRESHOLD
+        self._episodes = {}    # (temple, zone) -> time the current spell over the threshold began
+        self._lock = threading.Lock()
+
+    def zone_id(self, temple, zone):
+        key = (temple, zone)
+        zid = self.zones.get(key)
+        if zid is None:
+            with self._lock:
+                zid = self.zones.get(key)
+                if zid is None:
+                    zid = len(self.zone_keys)
+                    if zid >= len(self.sums):  # Grow the ring arrays by doubling
+                        grow = max(8, len(self.sums))
+                        self.sums = np.vstack([self.sums, np.zeros((grow, self.slots))])
+                        self.counts = np.vstack([self.counts, np.zeros((grow, self.slots), dtype=np.int64)])
+                        self.buckets = np.vstack([self.buckets, np.zeros((grow, self.slots), dtype=np.int64)])
+                    self.zone_keys.append(key)
+                    self.zones[key] = zid
+        return zid
+
+    def ingest(self, zone_ids, times, values):
+        # Add a batch into its buckets; a slot whose bucket has rolled over is reset first, late readings are dropped
+        zone_ids = np.asarray(zone_ids, dtype=np.int64)
+        if not len(zone_ids):
+            return
+        bucket = np.floor(np.asarray(times, dtype=float) / self.bucket_seconds).astype(np.int64)
+        values = np.asarray(values, dtype=float)
+        with self._lock:
+            size = self.sums.size
+            key = zone_ids * self.slots + bucket % self.slots
+            newest = np.full(size, np.iinfo(np.int64).min)
+            np.maximum.at(newest, key, bucket)
+            held = self.buckets.reshape(-1)
+            rolled = newest > held
+            held[rolled] = newest[rolled]
+            self.sums.reshape(-1)[rolled] = 0.0
+            self.counts.reshape(-1)[rolled] = 0
+            keep = bucket == held[key]
+            self.sums += np.bincount(key[keep], weights=values[keep], minlength=size).reshape(self.sums.shape)
+            self.counts += np.bincount(key[keep], minlength=size).reshape(self.counts.shape)
+            self.readings += int(keep.sum())
+
+    def ingest_lines(self, lines):
+        zone_ids, times, values = [], [], []
+        for line in lines:
+            parts = line.split(',')
+            if len(parts) != 5:
+                continue
+            try:
+                ts, value = float(parts[3]), float(parts[4])
+            except ValueError:
+                continue
+            times.append(ts)
+            values.append(value)
+            zid = self.zones.get((parts[0], parts[1]))
+            zone_ids.append(zid if zid is not None else self.zone_id(parts[0], parts[1]))
+        self.ingest(zone_ids, times, values)
+
+    def snapshot(self, now=None):
+        # Windowed metrics for every zone at once: mean density, rate of change (per s) and panic score 0..1
+        now = time.time() if now is None else now
+        with self._lock:
+            n = len(self.zone_keys)
+            sums, counts = self.sums[:n], self.counts[:n]
+            start = self.buckets[:n] * self.bucket_seconds
+            recent = start >= now - self.window
+            late = start >= now - self.window / 2
+            early = recent & ~late
+            count = (counts * recent).sum(axis=1)
+            density = np.where(count > 0, (sums * recent).sum(axis=1) / np.maximum(count, 1), np.nan)
+            late_n, early_n = (counts * late).sum(axis=1), (counts * early).sum(axis=1)
+            late_mean = (sums * late).sum(axis=1) / np.maximum(late_n, 1)
+            early_mean = (sums * early).sum(axis=1) / np.maximum(early_n, 1)
+            rate = np.where((late_n > 0) & (early_n > 0), (late_mean - early_mean) / (self.window / 2), 0.0)
+        # Either a packed zone or a fast build-up is enough on its own; together they compound
+        crowded = np.clip((density - DENSITY_CRITICAL) / (DENSITY_FULL - DENSITY_CRITICAL), 0, 1)
+        rising = np.clip(rate / RATE_CRITICAL, 0, 1)
+        panic = 1 - (1 - crowded) * (1 - rising)
+        return pd.DataFrame({
+            'temple': [k[0] for k in self.zone_keys[:n]], 'zone': [k[1] for k in self.zone_keys[:n]],
+            'density': density, 'rate': rate, 'panic_score': np.nan_to_num(panic), 'readings': count,
+        })
+
+    def temple_status(self, temple, now=None):
+        snap = self.snapshot(now)
+        return snap[(snap['temple'] == temple) & (snap['readings'] > 0)].reset_index(drop=True)
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+        return listener
+
+    def evaluate(self, now=None):
+        # One threshold check over every zone; listeners hear about each zone at or over PANIC_THRESHOLD on every
+        # check, with the start of its current spell as `episode` so one long spell is not counted as many incidents
+        now = time.time() if now is None else now
+        snap = self.snapshot(now)
+        hot = snap[(snap['readings'] > 0) & (snap['panic_score'] >= PANIC_THRESHOLD)]
+        episodes = {}
+        for row in hot.itertuples(index=False):
+            key = (row.temple, row.zone)
+            episodes[key] = episode = self._episodes.get(key, now)
+            for listener in self._listeners:
+                listener(row.temple, row.zone, float(row.panic_score), float(row.density), episode)
+        self._episodes = episodes
+        return hot
+
+
+class SensorServer:
+    # Runs its own asyncio loop on a daemon thread so Streamlit script threads never block on sockets
+    def __init__(self, hub, host=HOST, port=PORT):
+        self.hub = hub
+        self.host = host
+        self.port = port
+        self.loop = asyncio.new_event_loop()
+        self.error = None
+        self._ready = threading.Event()
+
+    async def _handle(self, reader, writer):
+        pending = b''
+        try:
+            while True:
+                chunk = await reader.read(1 << 16)
+                lines = (pending + chunk).split(b'\n')
+                pending = lines.pop() if chunk else b''  # At EOF the unterminated last line is complete too
+                # A garbled byte only spoils its own line, which ingest_lines then skips as malformed
+                self.hub.ingest_lines([l.decode(errors='replace') for l in lines if l])
+                if not chunk:
+                    break
+        finally:
+            writer.close()
+
+    async def _evaluate(self):
+        while True:
+            await asyncio.sleep(EVALUATE_SECONDS)
+            try:
+                self.hub.evaluate()
+            except Exception as e:  # A failing listener must not stop threshold checks
+                self.error = f"evaluate: {e!r}"
+
+    async def _serve(self):
+        try:
+            server = await asyncio.start_server(self._handle, self.host, self.port)
+        except OSError as e:  # Port taken (e.g. a second app process): fall back to an ephemeral port
+            self.error = str(e)
+            server = await asyncio.start_server(self._handle, self.host, 0)
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self.loop.create_task(self._evaluate())
+        async with server:
+            await server.serve_forever()
+
+    def start(self):
+        threading.Thread(target=self.loop.run_until_complete, args=(self._serve(),), daemon=True, name='sensor-server').start()
+        self._ready.wait(5)
+        return self
+
+
+class SensorSimulator:
+    # Stands in for hardware: `sensors_per_zone` sensors per zone send one reading per second over the socket
+    def __init__(self, temples, zones=DEFAULT_ZONES, sensors_per_zone=20, hz=1.0, seed=None):
+        self.temples = list(temples)
+        self.zones = list(zones)
+        self.sensors_per_zone = sensors_per_zone
+        self.hz = hz
+        self.rng = np.random.default_rng(seed)
+        self.level = self.rng.uniform(0.3, 0.6, (len(self.temples), len(self.zones)))
+        self.surges = {}  # (temple index, zone index) -> end time
+
+    def surge(self, temple, zone=None, seconds=60):
+        zone = zone if zone is not None else self.rng.choice(self.zones)
+        self.surges[(self.temples.index(temple), self.zones.index(zone))] = time.time() + seconds
+        return zone
+
+    def _tick(self, now):
+        self.level = np.clip(self.level + self.rng.normal(0, 0.01, self.level.shape), 0.2, 0.75)
+        target = self.level.copy()
+        for (ti, zi), end in list(self.surges.items()):
+            if now > end:
+                del self.surges[(ti, zi)]
+            else:
+                target[ti, zi] = min(0.98, target[ti, zi] + 0.45)
+        noise = self.rng.normal(0, 0.05, target.shape + (self.sensors_per_zone,))
+        readings = np.clip(target[..., None] + noise, 0, 1)
+        return ''.join(f"{t},{z},{t[:3]}-{zi}-{s},{now:.3f},{readings[ti, zi, s]:.3f}\n"
+                       for ti, t in enumerate(self.temples) for zi, z in enumerate(self.zones)
+                       for s in range(self.sensors_per_zone)).encode()
+
+    async def run(self, host=HOST, port=PORT, duration=None):
+        _, writer = await asyncio.open_connection(host, port)
+        start = time.time()
+        while duration is None or time.time() - start < duration:
+            writer.write(self._tick(time.time()))
+            await writer.drain()
+            await asyncio.sleep(1 / self.hz)
+        writer.close()
+
+    def start(self, server):
+        asyncio.run_coroutine_threadsafe(self.run(server.host, server.port), server.loop)
+        return self
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the sensor ingestion service, a simulator, or both as a benchmark.')
+    parser.add_argument('mode', choices=['serve', 'simulate', 'bench'])
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--temples', type=int, default=4)
+    parser.add_argument('--sensors', type=int, default=5000, help='Total sensors across all temples and zones')
+    parser.add_argument('--seconds', type=float, default=20)
+    args = parser.parse_args()
+    temples = [f"Temple{i}" for i in range(args.temples)]
+    per_zone = max(1, args.sensors // (args.temples * len(DEFAULT_ZONES)))
+    if args.mode == 'simulate':
+        asyncio.run(SensorSimulator(temples, sensors_per_zone=per_zone).run('127.0.0.1', args.port, args.seconds))
+    else:
+        hub = SensorHub()
+        server = SensorServer(hub, port=args.port).start()
+        print(f"listening on {server.host}:{server.port}")
+        if args.mode == 'serve':
+            threading.Event().wait()
+        SensorSimulator(temples, sensors_per_zone=per_zone).start(server)
+        cpu0, wall0 = time.process_time(), time.time()
+        while time.time() - wall0 < args.seconds:
+            time.sleep(1)
+            start = time.perf_counter()
+            snap = hub.snapshot()
+            snap_ms = (time.perf_counter() - start) * 1000
+        elapsed = time.time() - wall0
+        print(f"{hub.readings:,} readings from {per_zone * args.temples * len(DEFAULT_ZONES):,} sensors in {elapsed:.1f}s "
+              f"({hub.readings / elapsed:,.0f}/s), CPU {100 * (time.process_time() - cpu0) / elapsed:.0f}% of one core "
+              f"(incl. simulator), snapshot of {len(snap)} zones {snap_ms:.2f} ms")
@@ -0,0 +1,234 @@
+# Ticket Status API (#2) - tiny asyncio HTTP service so phones can poll wait times without loading the app
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from urllib.parse import unquote
+
+HOST = os.environ.get('YATRA_API_HOST', '127.0.0.1')
+PORT = int(os.environ.get('YATRA_API_PORT', 8766))
+PUBLIC_URL = os.environ.get('YATRA_API_PUBLIC_URL')  # Base URL phones can reach (proxy/ingress); no tracking links without it
+HEARTBEAT_SECONDS = 15  # SSE streams resend status this often even without queue events
+MAX_HEADER_BYTES = 8192
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+def ticket_status(ticket, now=None):
+    now = now or datetime.now()
+    elapsed = (now - ticket['join_time']).total_seconds() / 60 if isinstance(ticket.get('join_time'), datetime) else 0.0
+    remaining = max(0.0, ticket.get('est_wait', 0) - elapsed) if ticket['status'] == 'Waiting' else 0.0
+    return {
+        'ticket_id': ticket['ticket_id'], 'temple': ticket['temple'], 'status': ticket['status'],
+        'slot': ticket.get('slot'), 'slot_type': ticket.get('slot_type'), 'priority': bool(ticket.get('priority')),
+        'est_wait': ticket.get('est_wait'), 'remaining_min': round(remaining, 1),
+    }
+
+
+class StatusAPI:
+    # Shares the app's QueueEngine/QueueMetrics; runs its own event loop on a daemon thread
+    def __init__(self, engine, temples, metrics=None, forecast=None, prometheus=None, host=HOST, port=PORT, public_url=PUBLIC_URL):
+        self.engine = engine
+        self.temples = set(temples)   # Only these get summaries, so arbitrary URLs never create per-temple state
+        self.metrics = metrics
+        self.forecast = forecast      # Optional fn(temple) -> today's predicted footfall; run on an executor thread
+        self.prometheus = prometheus  # Optional fn() -> Prometheus exposition text, served at /metrics
+        self.host = host
+        self.port = port
+        self.public_url = public_url.rstrip('/') if public_url else None
+        self.loop = asyncio.new_event_loop()
+        self.error = None
+        self.failures = 0
+        self.last_failure = None
+        self.requests = 0
+        self.streams = 0
+        self._watchers = {}         # ticket_id -> set of futures woken on that ticket's next event
+        self._ready = threading.Event()
+        engine.subscribe(self._on_event)
+
+    def _on_event(self, event, ticket):
+        # Called on the engine's thread; hand over to the API loop
+        waiters = self._watchers.get(ticket['ticket_id'])
+        if waiters:
+            self.loop.call_soon_threadsafe(self._wake, ticket['ticket_id'])
+
+    def _wake(self, ticket_id):
+        for fut in self._watchers.pop(ticket_id, ()):
+            if not fut.done():
+                fut.set_result(None)
+
+    async def route(self, method, path):
+        # Returns (status, body dict), (200, bytes) for plain text, or (200, 'stream') for a ticket's event stream
+        parts = [unquote(p) for p in path.split('?', 1)[0].strip('/').split('/')]
+        if method != 'GET':
+            return 405, {'error': 'GET only'}
+        if parts == ['healthz']:
+            return 200, {'ok': True}
+        if parts == ['metrics'] and self.prometheus is not None:
+            return 200, self.prometheus().encode()
+        if len(parts) in (2, 3) and parts[0] == 'tickets':
+            if not parts[1].isdigit():
+                return 400, {'error': 'ticket id must be an integer'}
+            ticket = self.engine.ticket(int(parts[1]))
+            if ticket is None:
+                return 404, {'error': 'unknown ticket'}
+            if len(parts) == 3:
+                return (200, 'stream') if parts[2] == 'events' else (404, {'error': 'not found'})
+            return 200, ticket_status(ticket)
+        if len(parts) == 3 and parts[0] == 'temples' and parts[2] == 'summary':
+            if parts[1] not in self.temples:
+                return 404, {'error': 'unknown temple'}
+            body = {'temple': parts[1], 'waiting': self.engine.waiting_count(parts[1])}
+            if self.metrics is not None:
+                body.update(self.metrics.summary(parts[1]))
+            if self.forecast is not None:  # May load models or build a forecast table - keep it off the event loop
+                body['predicted_footfall'] = await self.loop.run_in_executor(None, self.forecast, parts[1])
+            return 200, body
+        return 404, {'error': 'not found'}
+
+    async def _stream(self, writer, ticket_id):
+        # Server-sent events: a status event now, on every change and every heartbeat; 'turn' when served
+        self.streams += 1
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        try:
+            while True:
+                ticket = self.engine.ticket(ticket_id)
+                if ticket is None:
+                    break
+                status = ticket_status(ticket)
+                writer.write(f"event: status\ndata: {json.dumps(status)}\n\n".encode())
+                if ticket['status'] != 'Waiting':
+                    if ticket['status'] == 'Served':
+                        writer.write(f"event: turn\ndata: {json.dumps(status)}\n\n".encode())
+                    await writer.drain()
+                    break
+                await writer.drain()
+                fut = self.loop.create_future()
+                self._watchers.setdefault(ticket_id, set()).add(fut)
+                try:
+                    await asyncio.wait_for(fut, HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    self._watchers.get(ticket_id, set()).discard(fut)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.streams -= 1
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:  # HTTP/1.1 keep-alive: many polls per connection
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, path, version = lines[0].split(' ')
+                except ValueError:
+                    status, body = 400, {'error': 'bad request line'}
+                    method, path, version = 'GET', '/', 'HTTP/1.0'
+                else:
+                    try:
+                        status, body = await self.route(method, path)
+                    except Exception as e:  # Answer instead of dropping the connection
+                        self.failures += 1
+                        self.last_failure = f"{path}: {e!r}"
+                        status, body = 500, {'error': 'internal error'}
+                self.requests += 1
+                if body == 'stream':
+                    await self._stream(writer, int(path.split('?', 1)[0].strip('/').split('/')[1]))
+                    break
+                close = version == 'HTTP/1.0' or 'connection: close' in head.decode('latin-1').lower()
+                if isinstance(body, bytes):
+                    payload, content_type = body, 'text/plain; version=0.0.4'
+                else:
+                    payload, content_type = json.dumps(body, default=str).encode(), 'application/json'
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: {content_type}\r\n"
+                             f"Content-Length: {len(payload)}\r\nAccess-Control-Allow-Origin: *\r\n"
+                             f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode() + payload)
+                await writer.drain()
+                if close:
+                    break
+        finally:
+            writer.close()
+
+    async def _serve(self):
+        try:
+            server = await asyncio.start_server(self._handle, self.host, self.port, limit=MAX_HEADER_BYTES, backlog=1024)
+        except OSError as e:  # Port taken (e.g. a second app process): fall back to an ephemeral port
+            self.error = str(e)
+            server = await asyncio.start_server(self._handle, self.host, 0, limit=MAX_HEADER_BYTES, backlog=1024)
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        async with server:
+            await server.serve_forever()
+
+    def start(self):
+        threading.Thread(target=self.loop.run_until_complete, args=(self._serve(),), daemon=True, name='status-api').start()
+        self._ready.wait(5)
+        return self
+
+    def url(self, ticket_id=None):
+        base = f"http://{self.host}:{self.port}"
+        return base if ticket_id is None else f"{base}/tickets/{ticket_id}"
+
+    def public_link(self, ticket_id):
+        # Tracking link for pilgrims' phones, only when a reachable base URL is configured
+        return None if self.public_url is None else f"{self.public_url}/tickets/{ticket_id}"
+
+    def stats(self):
+        return {'url': self.url(), 'requests': self.requests, 'open_streams': self.streams, 'error': self.error,
+                'failures': self.failures, 'last_failure': self.last_failure}
+
+
+async def load_test(host, port, ticket_ids, connections, requests):
+    # Keep-alive clients polling random tickets; returns per-request latencies in seconds
+    latencies = []
+    per_conn = requests // connections
+
+    async def client(k):
+        reader, writer = await asyncio.open_connection(host, port)
+        for i in range(per_conn):
+            tid = ticket_ids[(k * per_conn + i) % len(ticket_ids)]
+            start = time.perf_counter()
+            writer.write(f"GET /tickets/{tid} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+            head = await reader.readuntil(b'\r\n\r\n')
+            length = int(next(l for l in head.decode().split('\r\n') if l.lower().startswith('content-length')).split(':')[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+        writer.close()
+
+    await asyncio.gather(*(client(k) for k in range(connections)))
+    return latencies
+
+
+if __name__ == '__main__':
+    import numpy as np
+    from queue_engine import QueueEngine
+    from queue_metrics import QueueMetrics
+    parser = argparse.ArgumentParser(description='Serve the status API over a synthetic queue, or load-test it.')
+    parser.add_argument('mode', choices=['serve', 'loadtest'])
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--tickets', type=int, default=50000)
+    parser.add_argument('--connections', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=40000)
+    args = parser.parse_args()
+    engine = QueueEngine()
+    metrics = QueueMetrics()
+    engine.subscribe(metrics.on_event)
+    for i in range(args.tickets):
+        engine.join('Somnath', {'user_id': i, 'priority': i % 10 == 0, 'join_time': datetime.now(),
+                                'est_wait': 30 + i % 120, 'slot': '10:00', 'slot_type': 'Free'})
+    api = StatusAPI(engine, ['Somnath'], metrics, port=args.port).start()
+    print(f"serving {args.tickets:,} tickets at {api.url()}")
+    if args.mode == 'serve':
+        threading.Event().wait()
+    start = time.perf_counter()
+    lat = np.array(asyncio.run(load_test(api.host, api.port, list(range(1, args.tickets + 1)), args.connections, args.requests)))
+    elapsed = time.perf_counter() - start
+    print(f"{len(lat):,} requests over {args.connections} connections in {elapsed:.2f}s: {len(lat) / elapsed:,.0f} req/s, "
+          f"p50 {np.percentile(lat, 50) * 1000:.2f} ms, p99 {np.percentile(lat, 99) * 1000:.2f} ms "
+          f"(client and server share one process)")
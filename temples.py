@@ -0,0 +1,5 @@
+# Temple Data: Coords & Base Daily Footfall (from Gujarat Tourism/Wiki) - rows live in data/temples.csv, facilities in data/facilities.csv
+from catalog import load_catalog
+
+CATALOG = load_catalog()
+TEMPLE_DATA = CATALOG.temple_data()
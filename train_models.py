@@ -0,0 +1,78 @@
+# Nightly Training (#1) - build every temple's forest in parallel and report cost per model
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from model_registry import MODEL_DIR, artifact_path, held_out_split, save_artifact, train_model
+from temples import TEMPLE_DATA
+
+
+def _train_one(temple, base_footfall, freq, n_estimators, max_depth, n_jobs, model_dir, save):
+    start = time.perf_counter()
+    model, features, df = train_model(base_footfall, freq, n_estimators, max_depth, n_jobs)
+    train_s = time.perf_counter() - start
+    _, X_test, _, y_test = held_out_split(df, features)
+    mae = float(np.mean(np.abs(model.predict(X_test) - y_test.to_numpy())))
+    path = artifact_path(temple, base_footfall, model_dir, freq)
+    if save:
+        size = save_artifact(path, model, features, df, base_footfall, freq)
+    else:
+        import pickle
+        size = len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    return {
+        'temple': temple, 'n_estimators': n_estimators, 'max_depth': max_depth, 'n_jobs': n_jobs,
+        'train_seconds': round(train_s, 3), 'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'model_mb': round(size / 2**20, 2), 'held_out_mae': round(mae, 1), 'saved': path if save else None,
+    }
+
+
+def train_all(temples, workers=None, n_jobs=1, n_estimators=(100,), max_depths=(None,), freq='D', model_dir=MODEL_DIR, save=True):
+    # One fresh process per model (max_tasks_per_child=1) so peak RSS is per model, not per worker lifetime;
+    # children fork from a forkserver that already imported sklearn, so the per-model process is cheap
+    ctx = multiprocessing.get_context('forkserver')
+    ctx.set_forkserver_preload(['model_registry', 'sklearn.ensemble', 'sklearn.model_selection', 'joblib'])
+    jobs = [(temple, TEMPLE_DATA[temple]['base_footfall'], freq, n, d, n_jobs, model_dir, save)
+            for temple, n, d in itertools.product(temples, n_estimators, max_depths)]
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=ctx, max_tasks_per_child=1) as pool:
+        for fut in as_completed([pool.submit(_train_one, *job) for job in jobs]):
+            results.append(fut.result())
+    return results, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train all temple models in parallel and report per-model cost.')
+    parser.add_argument('--temples', nargs='+', default=list(TEMPLE_DATA), choices=list(TEMPLE_DATA))
+    parser.add_argument('--workers', type=int, default=None, help='Process pool size (default: CPU count)')
+    parser.add_argument('--n-jobs', type=int, default=1, help='Threads per forest (RandomForestRegressor n_jobs)')
+    parser.add_argument('--n-estimators', type=int, nargs='+', default=[100])
+    parser.add_argument('--max-depth', type=int, nargs='+', default=[0], help='0 means unlimited')
+    parser.add_argument('--freq', default='D', choices=['D', 'h'], help='Hourly models are stored separately; the app serves daily ones')
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--no-save', action='store_true', help='Benchmark only; do not replace stored models')
+    parser.add_argument('--report', help='Write the per-model results as JSON to this path')
+    args = parser.parse_args()
+
+    depths = [d or None for d in args.max_depth]
+    sweep = len(args.n_estimators) * len(depths) > 1
+    if sweep and not args.no_save:
+        print('Several configurations given - running as a benchmark sweep, stored models are left untouched.')
+    results, wall = train_all(args.temples, args.workers, args.n_jobs, args.n_estimators, depths, args.freq,
+                              args.model_dir, save=not (args.no_save or sweep))
+    results.sort(key=lambda r: (r['temple'], r['n_estimators'], r['max_depth'] or 0))
+    print(f"{'temple':<10} {'trees':>5} {'depth':>5} {'train s':>8} {'peak MB':>8} {'model MB':>9} {'MAE':>9}")
+    for r in results:
+        print(f"{r['temple']:<10} {r['n_estimators']:>5} {str(r['max_depth'] or '-'):>5} {r['train_seconds']:>8.2f} "
+              f"{r['peak_rss_mb']:>8.1f} {r['model_mb']:>9.2f} {r['held_out_mae']:>9.1f}")
+    print(f"Wall clock: {wall:.2f}s for {len(results)} models")
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'wall_seconds': round(wall, 3), 'models': results}, f, indent=2)